@@ -492,6 +492,36 @@ function sanitizeHistoryMessage(message, entry) {
     return replaceNamePlaceholders(message, targetName, userName);
 }
 
+let prefetchTimer = null;
+let lastPrefetchedProfile = '';
+// Shorter text is a fragment, not a pasted profile; each prefetch runs the full analysis
+const PREFETCH_MIN_CHARS = 200;
+
+// Start analysing a pasted target profile in the background so Generate only waits on drafting
+function schedulePrefetch() {
+    clearTimeout(prefetchTimer);
+    // The pasted text lands in the textarea after the paste event
+    prefetchTimer = setTimeout(() => {
+        const targetProfile = document.getElementById('target-profile').value.trim();
+        if (targetProfile.length < PREFETCH_MIN_CHARS || !userProfileText || targetProfile === lastPrefetchedProfile) {
+            return;
+        }
+        lastPrefetchedProfile = targetProfile;
+        fetch(`${API_BASE}/api/outreach/prefetch`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                uuid: getUUID(),
+                target_profile: targetProfile
+            })
+        }).catch(() => {
+            // Prefetch is best-effort; Generate still does the full pipeline
+        });
+    }, 300);
+}
+
 async function generateOutreach() {
     const targetProfile = document.getElementById('target-profile').value.trim();
     const contextNote = document.getElementById('context-note').value.trim();
@@ -523,7 +553,7 @@ async function generateOutreach() {
     showMessage(messageDiv, 'Generating outreach messages...', 'success');
     
     try {
-        const response = await fetch(`${API_BASE}/api/outreach/generate`, {
+        const requestOutreach = (duplicatePolicy) => fetch(`${API_BASE}/api/outreach/generate`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -531,11 +561,53 @@ async function generateOutreach() {
             body: JSON.stringify({
                 uuid: getUUID(),
                 target_profile: targetProfile,
-                context_note: contextNote
+                context_note: contextNote,
+                duplicate_policy: duplicatePolicy
             })
         });
         
-        const data = await response.json();
+        // Instant template draft of the connection request while the tailored messages are generated
+        let generated = false;
+        fetch(`${API_BASE}/api/outreach/connection-request`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                uuid: getUUID(),
+                target_profile: targetProfile,
+                context_note: contextNote
+            })
+        })
+            .then(res => res.ok ? res.json() : null)
+            .then(preview => {
+                if (!preview || generated) return;
+                document.getElementById('linkedin-result').value = replaceNamePlaceholders(
+                    preview.linkedin_connection_request,
+                    targetFirstName,
+                    userFirstName
+                );
+                ['post-connection-result', 'email-result', 'followup-result'].forEach(id => {
+                    document.getElementById(id).value = 'Generating...';
+                });
+                updateCharCounts();
+                document.getElementById('outreach-results').style.display = 'block';
+            })
+            .catch(() => {});
+        
+        let response = await requestOutreach('offer');
+        let data = await response.json();
+        
+        // The same person is already in history: reuse that outreach or generate fresh
+        if (response.status === 409 && data.detail && data.detail.duplicate) {
+            const duplicate = data.detail.duplicate;
+            const who = duplicate.contact_name || 'this person';
+            const when = duplicate.timestamp ? new Date(duplicate.timestamp).toLocaleDateString() : 'earlier';
+            const reuse = confirm(`You already generated outreach for ${who} on ${when}. Reuse it instead of generating again?`);
+            response = await requestOutreach(reuse ? 'reuse' : 'ignore');
+            data = await response.json();
+        }
+        generated = true;
 
         if (data.success) {
             currentHistoryId = data.history_id;
@@ -604,6 +676,9 @@ async function generateOutreach() {
                     showMessage(messageDiv, `Follow-up generation error: ${error.message}`, 'error');
                 }
             }
+        } else if (response.status === 429 || response.status === 503) {
+            const retryAfter = response.headers.get('Retry-After');
+            showMessage(messageDiv, `${data.detail}${retryAfter ? ` (try again in ${retryAfter}s)` : ''}`, 'error');
         } else {
             showMessage(messageDiv, 'Failed to generate outreach', 'error');
         }
@@ -804,20 +879,46 @@ async function applyRefinement() {
     }
 }
 
+// History items seen so far and the server version they reflect, so reopening
+// the panel only fetches entries changed since then
+const historyCache = { uuid: null, version: null, items: new Map() };
+
+async function fetchHistoryItems() {
+    const uuid = getUUID();
+    if (historyCache.uuid !== uuid) {
+        historyCache.uuid = uuid;
+        historyCache.version = null;
+        historyCache.items = new Map();
+    }
+
+    const since = historyCache.version !== null ? `?since=${historyCache.version}` : '';
+    const response = await fetch(`${API_BASE}/api/history/${uuid}${since}`);
+    const data = await response.json();
+    if (!data.success) {
+        return null;
+    }
+
+    if (!data.delta) {
+        historyCache.items = new Map();
+    }
+    data.history.forEach(item => historyCache.items.set(item.id, item));
+    historyCache.version = data.version;
+    return [...historyCache.items.values()];
+}
+
 // History - sort newest first and use local timezone
 async function loadHistory() {
     const historyList = document.getElementById('history-list');
     historyList.innerHTML = '<p>Loading...</p>';
     
     try {
-        const response = await fetch(`${API_BASE}/api/history/${getUUID()}`);
-        const data = await response.json();
+        const history = await fetchHistoryItems();
         
-        if (data.success && data.history.length > 0) {
+        if (history && history.length > 0) {
             historyList.innerHTML = '';
             
             // Sort by timestamp descending (newest first)
-            const sortedHistory = [...data.history].sort((a, b) => {
+            const sortedHistory = [...history].sort((a, b) => {
                 const timeA = new Date(a.timestamp).getTime();
                 const timeB = new Date(b.timestamp).getTime();
                 return timeB - timeA; // Descending order
@@ -994,6 +1095,11 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
     
+    const targetProfileInput = document.getElementById('target-profile');
+    if (targetProfileInput) {
+        targetProfileInput.addEventListener('paste', schedulePrefetch);
+    }
+    
     // Initialize app flow (handles first visit, profile check, etc.)
     initializeApp();
 });
@@ -1,69 +1,160 @@
 """ExtractorAgent - Extracts structured data from LinkedIn profiles."""
 from crewai import Agent
-from openai import OpenAI
 import os
-import json
-from typing import Dict, Any
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+try:
+    from backend.logic.cache import cache_key, get_cache
+    from backend.logic.clients import get_openai_client
+    from backend.logic.profile_parser import parse_profile
+    from backend.logic.profile_sections import chunk_sections, merge_profiles
+    from backend.logic.profiling import profiled
+    from backend.logic.prompts import PromptTemplate
+    from backend.logic.schemas import ProfileExtraction
+    from backend.logic.structured_output import complete_structured
+except ImportError:
+    from logic.cache import cache_key, get_cache
+    from logic.clients import get_openai_client
+    from logic.profile_parser import parse_profile
+    from logic.profile_sections import chunk_sections, merge_profiles
+    from logic.profiling import profiled
+    from logic.prompts import PromptTemplate
+    from logic.schemas import ProfileExtraction
+    from logic.structured_output import complete_structured
+
+EXTRACT_PROMPT = PromptTemplate(
+    name="extractor",
+    version=1,
+    system="You are a data extraction specialist. Extract structured information from LinkedIn profiles. Always return valid JSON only.",
+    instructions="""Extract structured information from the LinkedIn profile text in the user message. Return ONLY valid JSON, no markdown or extra text.
+
+Extract and return a JSON object with these fields:
+{
+  "work_history": [{"company": "...", "role": "...", "duration": "...", "responsibilities": "..."}],
+  "education": [{"school": "...", "degree": "...", "field": "..."}],
+  "skills": ["skill1", "skill2", ...],
+  "industries": ["industry1", "industry2", ...],
+  "achievements": ["achievement1", "achievement2", ...],
+  "keywords": ["keyword1", "keyword2", ...],
+  "tone_indicators": {"professional": true/false, "casual": true/false, "technical": true/false}
+}
+
+Return ONLY the JSON object, nothing else.""",
+    data_template="""Profile text:
+{profile_text}"""
+)
 
 
 class ExtractorAgent:
     """Agent that extracts structured JSON from LinkedIn profile text."""
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = get_openai_client()
         self.model = "gpt-4o-mini"
+        # Minimum rule-based parser confidence needed to skip the LLM
+        self.fast_path_threshold = float(os.getenv("FAST_EXTRACT_THRESHOLD", "0.8"))
+        # Profiles at least this long are extracted section by section in parallel
+        self.chunked_min_chars = int(os.getenv("CHUNKED_EXTRACT_MIN_CHARS", "3000"))
+        self.chunk_chars = int(os.getenv("CHUNKED_EXTRACT_CHUNK_CHARS", "2000"))
+        self.max_chunk_workers = int(os.getenv("CHUNKED_EXTRACT_MAX_WORKERS", "4"))
+        # LLM extractions, shared across workers when the cache backend is
+        self.cache = get_cache().namespace(
+            "extraction", float(os.getenv("CACHE_EXTRACTION_TTL_SECONDS", str(7 * 24 * 3600)))
+        )
     
+    @profiled("extract")
     def extract(self, profile_text: str) -> Dict[str, Any]:
         """Extract structured data from profile text."""
-        prompt = f"""Extract structured information from this LinkedIn profile text. Return ONLY valid JSON, no markdown or extra text.
-
-Profile text:
-{profile_text}
-
-Extract and return a JSON object with these fields:
-{{
-  "work_history": [{{"company": "...", "role": "...", "duration": "...", "responsibilities": "..."}}],
-  "education": [{{"school": "...", "degree": "...", "field": "..."}}],
-  "skills": ["skill1", "skill2", ...],
-  "industries": ["industry1", "industry2", ...],
-  "achievements": ["achievement1", "achievement2", ...],
-  "keywords": ["keyword1", "keyword2", ...],
-  "tone_indicators": {{"professional": true/false, "casual": true/false, "technical": true/false}}
-}}
-
-Return ONLY the JSON object, nothing else."""
+        profile, confidence = parse_profile(profile_text)
+        if confidence >= self.fast_path_threshold:
+            return profile
+        
+        key = cache_key(self.model, EXTRACT_PROMPT.name, EXTRACT_PROMPT.version, profile_text)
+        return self.cache.get_or_compute(key, lambda: self._extract_uncached(profile_text))
+    
+    def _extract_uncached(self, profile_text: str) -> Dict[str, Any]:
+        chunks = self._chunks(profile_text)
+        if len(chunks) == 1:
+            return self._extract_with_llm(profile_text)
+        
+        # Long profiles: extract each group of sections concurrently and merge the results
+        return merge_profiles(self._extract_parallel(chunks))
+    
+    def _extract_parallel(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Extract several texts concurrently, at most max_chunk_workers at a time."""
+        if len(texts) == 1:
+            return [self._extract_with_llm(texts[0])]
+        
+        with ThreadPoolExecutor(max_workers=min(len(texts), self.max_chunk_workers)) as pool:
+            # Each chunk runs in a copy of the caller's context so it keeps its scheduling priority
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._extract_with_llm, text)
+                for text in texts
+            ]
+            return [future.result() for future in futures]
+    
+    def _chunks(self, profile_text: str) -> List[str]:
+        """The units extract() sends to the LLM: the whole text, or its section chunks when long."""
+        if len(profile_text) >= self.chunked_min_chars:
+            chunks = chunk_sections(profile_text, self.chunk_chars)
+            if len(chunks) > 1:
+                return chunks
+        return [profile_text]
+    
+    @profiled("extract_incremental")
+    def extract_incremental(
+        self, profile_text: str, previous_chunks: Optional[List[Dict[str, Any]]] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], int]:
+        """
+        Extract a profile, reusing previous per-chunk results.
 
-        response = self.client.chat.completions.create(
+        The text is split into the same chunks extract() would use (one chunk
+        below CHUNKED_EXTRACT_MIN_CHARS). previous_chunks is the state returned
+        by an earlier call ([{hash, extraction}]); only chunks whose text is new
+        are sent to the LLM. With nothing to reuse this is extract(). Returns
+        the merged profile, the new chunk state and the number of chunks
+        re-extracted.
+        """
+        chunks = self._chunks(profile_text)
+        hashes = [hashlib.sha256(chunk.encode("utf-8")).hexdigest() for chunk in chunks]
+        profile, confidence = parse_profile(profile_text)
+        if confidence >= self.fast_path_threshold:
+            return profile, [{"hash": digest, "extraction": None} for digest in hashes], 0
+        
+        cached = {
+            c["hash"]: c["extraction"] for c in (previous_chunks or [])
+            if c.get("hash") and c.get("extraction") is not None
+        }
+        changed = [i for i, digest in enumerate(hashes) if digest not in cached]
+        
+        if len(changed) == len(chunks):
+            # Nothing reusable: the same cached call(s) extract() would make
+            key = cache_key(self.model, EXTRACT_PROMPT.name, EXTRACT_PROMPT.version, profile_text)
+            if len(chunks) == 1:
+                extraction = self.cache.get_or_compute(key, lambda: self._extract_with_llm(profile_text))
+                return extraction, [{"hash": hashes[0], "extraction": extraction}], 1
+            extractions = self._extract_parallel(chunks)
+            profile = merge_profiles(extractions)
+            self.cache.set(key, profile)
+        else:
+            fresh = dict(zip(changed, self._extract_parallel([chunks[i] for i in changed])))
+            extractions = [fresh[i] if i in fresh else cached[digest] for i, digest in enumerate(hashes)]
+            profile = merge_profiles(extractions)
+        
+        state = [{"hash": digest, "extraction": extraction} for digest, extraction in zip(hashes, extractions)]
+        return profile, state, len(changed)
+    
+    def _extract_with_llm(self, profile_text: str) -> Dict[str, Any]:
+        """Extract structured data from profile text using the LLM."""
+        result = complete_structured(
+            self.client,
+            EXTRACT_PROMPT,
             model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a data extraction specialist. Extract structured information from LinkedIn profiles. Always return valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=EXTRACT_PROMPT.render(profile_text=profile_text),
+            schema=ProfileExtraction,
             temperature=0.1
         )
         
-        content = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-        
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback structure if parsing fails
-            return {
-                "work_history": [],
-                "education": [],
-                "skills": [],
-                "industries": [],
-                "achievements": [],
-                "keywords": [],
-                "tone_indicators": {}
-            }
-
+        return result.model_dump()
@@ -1,20 +1,59 @@
 """FollowUpAgent - Generates follow-up messages when outreach is accepted."""
-from openai import OpenAI
-import os
 from typing import Dict, Any
 try:
+    from backend.logic.clients import get_openai_client
+    from backend.logic.llm import chat_completion
+    from backend.logic.profiling import profiled
+    from backend.logic.prompts import PromptTemplate
     from backend.logic.sanitizer import enforce_character_limit
 except ImportError:
+    from logic.clients import get_openai_client
+    from logic.llm import chat_completion
+    from logic.profiling import profiled
+    from logic.prompts import PromptTemplate
     from logic.sanitizer import enforce_character_limit
 
+FOLLOWUP_PROMPT = PromptTemplate(
+    name="followup",
+    version=1,
+    system="You are an expert at writing friendly, natural follow-up messages. Always keep messages under 1200 characters. Return only the message text.",
+    instructions="""Generate a friendly, low-pressure follow-up message for a LinkedIn connection that was accepted.
+
+Context:
+- The original outreach was accepted
+- User wants to continue the conversation naturally
+- Goal: friendly follow-up with a natural coffee chat ask
+
+Use the profiles and original outreach in the user message to generate a follow-up message that:
+- Is friendly and warm
+- References the connection naturally
+- Contains a natural, low-pressure coffee chat ask
+- Is professional but personable
+- MUST be under 1200 characters
+
+Return ONLY the message text, nothing else.""",
+    # Ordered from most to least stable: the user's own profile rarely changes
+    data_template="""User Profile:
+- Industries: {user_industries}
+- Background: {user_background}
+
+Target Profile:
+- Industries: {target_industries}
+- Background: {target_background}
+
+Original Outreach (for context):
+LinkedIn: {original_linkedin}"""
+)
+
 
 class FollowUpAgent:
     """Agent that generates friendly follow-up messages."""
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = get_openai_client()
         self.model = "gpt-4o"
     
+    @profiled("followup")
     def generate_followup(
         self,
         original_outreach: Dict[str, Any],
@@ -23,39 +62,17 @@ class FollowUpAgent:
     ) -> str:
         """Generate a friendly follow-up message."""
         
-        prompt = f"""Generate a friendly, low-pressure follow-up message for a LinkedIn connection that was accepted.
-
-Context:
-- The original outreach was accepted
-- User wants to continue the conversation naturally
-- Goal: friendly follow-up with a natural coffee chat ask
-
-User Profile:
-- Industries: {', '.join(user_profile.get('industries', []))}
-- Background: {str(user_profile.get('work_history', [])[:1])}
-
-Target Profile:
-- Industries: {', '.join(target_profile.get('industries', []))}
-- Background: {str(target_profile.get('work_history', [])[:1])}
-
-Original Outreach (for context):
-LinkedIn: {original_outreach.get('linkedin_connection_request', '')[:100]}
-
-Generate a follow-up message that:
-- Is friendly and warm
-- References the connection naturally
-- Contains a natural, low-pressure coffee chat ask
-- Is professional but personable
-- MUST be under 1200 characters
-
-Return ONLY the message text, nothing else."""
-
-        response = self.client.chat.completions.create(
+        response = chat_completion(
+            self.client,
+            FOLLOWUP_PROMPT,
             model=self.model,
-            messages=[
-                {"role": "system", "content": "You are an expert at writing friendly, natural follow-up messages. Always keep messages under 1200 characters. Return only the message text."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=FOLLOWUP_PROMPT.render(
+                user_industries=', '.join(user_profile.get('industries', [])),
+                user_background=str(user_profile.get('work_history', [])[:1]),
+                target_industries=', '.join(target_profile.get('industries', [])),
+                target_background=str(target_profile.get('work_history', [])[:1]),
+                original_linkedin=original_outreach.get('linkedin_connection_request', '')[:100]
+            ),
             temperature=0.7
         )
         
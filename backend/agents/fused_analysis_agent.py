@@ -0,0 +1,76 @@
+"""FusedAnalysisAgent - Extracts a target profile and finds overlaps in one call."""
+import json
+from typing import Dict, Any
+try:
+    from backend.logic.clients import get_openai_client
+    from backend.logic.profiling import profiled
+    from backend.logic.prompts import PromptTemplate
+    from backend.logic.schemas import FusedAnalysis
+    from backend.logic.structured_output import complete_structured
+except ImportError:
+    from logic.clients import get_openai_client
+    from logic.profiling import profiled
+    from logic.prompts import PromptTemplate
+    from logic.schemas import FusedAnalysis
+    from logic.structured_output import complete_structured
+
+FUSED_ANALYSIS_PROMPT = PromptTemplate(
+    name="fused_analysis",
+    version=1,
+    system="You are a profile analysis specialist. Extract structured information from LinkedIn profiles and identify meaningful overlaps. Always return valid JSON only.",
+    instructions="""Extract structured information from the target LinkedIn profile text in the user message, then compare it with the user profile to identify overlaps and alignment opportunities. Return ONLY valid JSON, no markdown or extra text.
+
+Return a JSON object with exactly these two top-level fields:
+{
+  "target_profile": {
+    "work_history": [{"company": "...", "role": "...", "duration": "...", "responsibilities": "..."}],
+    "education": [{"school": "...", "degree": "...", "field": "..."}],
+    "skills": ["skill1", "skill2", ...],
+    "industries": ["industry1", "industry2", ...],
+    "achievements": ["achievement1", "achievement2", ...],
+    "keywords": ["keyword1", "keyword2", ...],
+    "tone_indicators": {"professional": true/false, "casual": true/false, "technical": true/false}
+  },
+  "overlap_summary": {
+    "shared_companies": ["company1", "company2", ...],
+    "shared_schools": ["school1", "school2", ...],
+    "shared_industries": ["industry1", "industry2", ...],
+    "skill_overlap": ["skill1", "skill2", ...],
+    "alignment": "brief description of how profiles align",
+    "personalization_hook_options": ["hook1", "hook2", "hook3"]
+  }
+}
+
+Return ONLY the JSON object, nothing else.""",
+    # The user profile is identical across a user's requests, so it goes first
+    data_template="""User Profile:
+{user_profile}
+
+Target profile text:
+{profile_text}"""
+)
+
+
+class FusedAnalysisAgent:
+    """Agent that combines ExtractorAgent and OverlapAgent into a single LLM call."""
+
+    def __init__(self):
+        self.client = get_openai_client()
+        self.model = "gpt-4o-mini"
+
+    @profiled("fused_analysis")
+    def extract_and_find_overlaps(self, user_profile: Dict[str, Any], profile_text: str) -> Dict[str, Any]:
+        """Extract the target profile and compare it against the user profile."""
+        result = complete_structured(
+            self.client,
+            FUSED_ANALYSIS_PROMPT,
+            model=self.model,
+            messages=FUSED_ANALYSIS_PROMPT.render(
+                user_profile=json.dumps(user_profile, indent=2),
+                profile_text=profile_text
+            ),
+            schema=FusedAnalysis,
+            temperature=0.1
+        )
+
+        return result.model_dump()
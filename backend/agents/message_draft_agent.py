@@ -1,66 +1,28 @@
 """MessageDraftAgent - Generates outreach messages."""
-from openai import OpenAI
-import os
 import json
 from typing import Dict, Any, List
 try:
+    from backend.logic.clients import get_openai_client
+    from backend.logic.profiling import profiled
+    from backend.logic.prompts import PromptTemplate
     from backend.logic.sanitizer import enforce_character_limit
+    from backend.logic.schemas import DraftMessages
+    from backend.logic.structured_output import complete_structured, complete_structured_variants
 except ImportError:
+    from logic.clients import get_openai_client
+    from logic.profiling import profiled
+    from logic.prompts import PromptTemplate
     from logic.sanitizer import enforce_character_limit
+    from logic.schemas import DraftMessages
+    from logic.structured_output import complete_structured, complete_structured_variants
 
+DRAFT_PROMPT = PromptTemplate(
+    name="message_draft",
+    version=1,
+    system="You are an expert cold outreach writer. Always respect character limits strictly. Return only valid JSON.",
+    instructions="""You are an expert at writing personalized, effective cold outreach messages following SalesBread best practices.
 
-class MessageDraftAgent:
-    """Agent that drafts LinkedIn connection requests, emails, and follow-ups."""
-    
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.model = "gpt-4o"  # Using gpt-4o as gpt-5.1 doesn't exist yet
-    
-    def draft_messages(
-        self,
-        user_profile: Dict[str, Any],
-        target_profile: Dict[str, Any],
-        overlap_summary: Dict[str, Any],
-        context_attributes: Dict[str, Any],
-        exa_results: List[Dict[str, Any]]
-    ) -> Dict[str, str]:
-        """Generate all three message types."""
-        
-        # Build context summary
-        exa_summary = "\n".join([
-            f"- {r.get('title', '')}: {r.get('summary', '')}"
-            for r in exa_results[:3]
-        ])
-        
-        prompt = f"""You are an expert at writing personalized, effective cold outreach messages following SalesBread best practices.
-
-User Profile Summary:
-- Industries: {', '.join(user_profile.get('industries', []))}
-- Skills: {', '.join(user_profile.get('skills', [])[:10])}
-- Background: {json.dumps(user_profile.get('work_history', [])[:2], indent=2)}
-
-Target Profile Summary:
-- Industries: {', '.join(target_profile.get('industries', []))}
-- Skills: {', '.join(target_profile.get('skills', [])[:10])}
-- Background: {json.dumps(target_profile.get('work_history', [])[:2], indent=2)}
-
-Overlap Analysis:
-- Shared Companies: {', '.join(overlap_summary.get('shared_companies', []))}
-- Shared Schools: {', '.join(overlap_summary.get('shared_schools', []))}
-- Shared Industries: {', '.join(overlap_summary.get('shared_industries', []))}
-- Skill Overlap: {', '.join(overlap_summary.get('skill_overlap', []))}
-- Alignment: {overlap_summary.get('alignment', '')}
-- Hook Options: {', '.join(overlap_summary.get('personalization_hook_options', []))}
-
-Context:
-- Outreach Goal: {context_attributes.get('outreach_goal', 'learn about their work')}
-- Connection Context: {context_attributes.get('connection_context', 'no prior connection')}
-- Personal Hook: {context_attributes.get('personal_hook', '')}
-
-Relevant Insights:
-{exa_summary if exa_summary else 'None'}
-
-Generate three messages following these guidelines:
+Using the profiles, overlap analysis, context and insights in the user message, generate three messages following these guidelines:
 
 1. LINKEDIN CONNECTION REQUEST (MAX 300 characters):
    - Personal, warm, and concise
@@ -84,43 +46,129 @@ Generate three messages following these guidelines:
    - MUST be under 1200 characters
 
 Return ONLY a JSON object with this structure:
-{{
+{
   "linkedin_connection_request": "message text (≤300 chars)",
   "cold_outreach_email": "Subject: ...\\n\\nEmail body (≤1200 chars)",
   "followup_template": "message text (≤1200 chars)"
-}}
+}
+
+CRITICAL: All messages MUST respect character limits. If any message exceeds its limit, automatically shorten it while preserving clarity, tone, and personalization.""",
+    # Ordered from most to least stable: the user's own profile rarely changes
+    data_template="""User Profile Summary:
+- Industries: {user_industries}
+- Skills: {user_skills}
+- Background: {user_background}
+
+Target Profile Summary:
+- Industries: {target_industries}
+- Skills: {target_skills}
+- Background: {target_background}
 
-CRITICAL: All messages MUST respect character limits. If any message exceeds its limit, automatically shorten it while preserving clarity, tone, and personalization."""
+Overlap Analysis:
+- Shared Companies: {shared_companies}
+- Shared Schools: {shared_schools}
+- Shared Industries: {shared_industries}
+- Skill Overlap: {skill_overlap}
+- Alignment: {alignment}
+- Hook Options: {hook_options}
+
+Context:
+- Outreach Goal: {outreach_goal}
+- Connection Context: {connection_context}
+- Personal Hook: {personal_hook}
+
+Relevant Insights:
+{insights}"""
+)
 
-        response = self.client.chat.completions.create(
+
+class MessageDraftAgent:
+    """Agent that drafts LinkedIn connection requests, emails, and follow-ups."""
+    
+    def __init__(self):
+        self.client = get_openai_client()
+        self.model = "gpt-4o"  # Using gpt-4o as gpt-5.1 doesn't exist yet
+    
+    @profiled("draft")
+    def draft_messages(
+        self,
+        user_profile: Dict[str, Any],
+        target_profile: Dict[str, Any],
+        overlap_summary: Dict[str, Any],
+        context_attributes: Dict[str, Any],
+        exa_results: List[Dict[str, Any]]
+    ) -> Dict[str, str]:
+        """Generate all three message types."""
+        result = complete_structured(
+            self.client,
+            DRAFT_PROMPT,
             model=self.model,
-            messages=[
-                {"role": "system", "content": "You are an expert cold outreach writer. Always respect character limits strictly. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=self._build_messages(user_profile, target_profile, overlap_summary, context_attributes, exa_results),
+            schema=DraftMessages,
             temperature=0.7
         )
         
-        content = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
+        return self._enforce_limits(result.model_dump())
+    
+    @profiled("draft")
+    def draft_message_variants(
+        self,
+        user_profile: Dict[str, Any],
+        target_profile: Dict[str, Any],
+        overlap_summary: Dict[str, Any],
+        context_attributes: Dict[str, Any],
+        exa_results: List[Dict[str, Any]],
+        variants: int
+    ) -> List[Dict[str, str]]:
+        """Generate several independent sets of the three messages in one completion."""
+        results = complete_structured_variants(
+            self.client,
+            DRAFT_PROMPT,
+            model=self.model,
+            messages=self._build_messages(user_profile, target_profile, overlap_summary, context_attributes, exa_results),
+            schema=DraftMessages,
+            temperature=0.7,
+            n=variants
+        )
         
-        try:
-            messages = json.loads(content)
-        except json.JSONDecodeError:
-            messages = {
-                "linkedin_connection_request": "",
-                "cold_outreach_email": "",
-                "followup_template": ""
-            }
+        return [self._enforce_limits(result.model_dump()) for result in results]
+    
+    def _build_messages(
+        self,
+        user_profile: Dict[str, Any],
+        target_profile: Dict[str, Any],
+        overlap_summary: Dict[str, Any],
+        context_attributes: Dict[str, Any],
+        exa_results: List[Dict[str, Any]]
+    ) -> List[Dict[str, str]]:
+        """Build the chat messages shared by single and multi-variant drafting."""
+        # Build context summary
+        exa_summary = "\n".join([
+            f"- {r.get('title', '')}: {r.get('summary', '')}"
+            for r in exa_results[:3]
+        ])
         
+        return DRAFT_PROMPT.render(
+            user_industries=', '.join(user_profile.get('industries', [])),
+            user_skills=', '.join(user_profile.get('skills', [])[:10]),
+            user_background=json.dumps(user_profile.get('work_history', [])[:2], indent=2),
+            target_industries=', '.join(target_profile.get('industries', [])),
+            target_skills=', '.join(target_profile.get('skills', [])[:10]),
+            target_background=json.dumps(target_profile.get('work_history', [])[:2], indent=2),
+            shared_companies=', '.join(overlap_summary.get('shared_companies', [])),
+            shared_schools=', '.join(overlap_summary.get('shared_schools', [])),
+            shared_industries=', '.join(overlap_summary.get('shared_industries', [])),
+            skill_overlap=', '.join(overlap_summary.get('skill_overlap', [])),
+            alignment=overlap_summary.get('alignment', ''),
+            hook_options=', '.join(overlap_summary.get('personalization_hook_options', [])),
+            outreach_goal=context_attributes.get('outreach_goal', 'learn about their work'),
+            connection_context=context_attributes.get('connection_context', 'no prior connection'),
+            personal_hook=context_attributes.get('personal_hook', ''),
+            insights=exa_summary if exa_summary else 'None'
+        )
+    
+    def _enforce_limits(self, messages: Dict[str, str]) -> Dict[str, str]:
+        """Truncate each message to its platform character limit."""
         # Enforce character limits
         messages["linkedin_connection_request"] = enforce_character_limit(
             messages.get("linkedin_connection_request", ""), 300
@@ -1,69 +1,65 @@
 """OverlapAgent - Compares user and target profiles to find overlaps."""
-from openai import OpenAI
-import os
 import json
 from typing import Dict, Any
+try:
+    from backend.logic.clients import get_openai_client
+    from backend.logic.profiling import profiled
+    from backend.logic.prompts import PromptTemplate
+    from backend.logic.schemas import OverlapSummary
+    from backend.logic.structured_output import complete_structured
+except ImportError:
+    from logic.clients import get_openai_client
+    from logic.profiling import profiled
+    from logic.prompts import PromptTemplate
+    from logic.schemas import OverlapSummary
+    from logic.structured_output import complete_structured
 
-
-class OverlapAgent:
-    """Agent that finds overlaps between user and target profiles."""
-    
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.model = "gpt-4o-mini"
-    
-    def find_overlaps(self, user_profile: Dict[str, Any], target_profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Find overlaps between user and target profiles."""
-        prompt = f"""Compare these two LinkedIn profiles and identify overlaps and alignment opportunities.
-
-User Profile:
-{json.dumps(user_profile, indent=2)}
-
-Target Profile:
-{json.dumps(target_profile, indent=2)}
+OVERLAP_PROMPT = PromptTemplate(
+    name="overlap",
+    version=1,
+    system="You are a profile analysis specialist. Compare profiles and identify meaningful overlaps. Always return valid JSON only.",
+    instructions="""Compare the two LinkedIn profiles in the user message and identify overlaps and alignment opportunities.
 
 Analyze and return a JSON object with:
-{{
+{
   "shared_companies": ["company1", "company2", ...],
   "shared_schools": ["school1", "school2", ...],
   "shared_industries": ["industry1", "industry2", ...],
   "skill_overlap": ["skill1", "skill2", ...],
   "alignment": "brief description of how profiles align",
   "personalization_hook_options": ["hook1", "hook2", "hook3"]
-}}
+}
+
+Return ONLY the JSON object, nothing else.""",
+    # The user profile is identical across a user's requests, so it goes first
+    data_template="""User Profile:
+{user_profile}
+
+Target Profile:
+{target_profile}"""
+)
 
-Return ONLY the JSON object, nothing else."""
 
-        response = self.client.chat.completions.create(
+class OverlapAgent:
+    """Agent that finds overlaps between user and target profiles."""
+    
+    def __init__(self):
+        self.client = get_openai_client()
+        self.model = "gpt-4o-mini"
+    
+    @profiled("overlap")
+    def find_overlaps(self, user_profile: Dict[str, Any], target_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Find overlaps between user and target profiles."""
+        result = complete_structured(
+            self.client,
+            OVERLAP_PROMPT,
             model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a profile analysis specialist. Compare profiles and identify meaningful overlaps. Always return valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=OVERLAP_PROMPT.render(
+                user_profile=json.dumps(user_profile, indent=2),
+                target_profile=json.dumps(target_profile, indent=2)
+            ),
+            schema=OverlapSummary,
             temperature=0.2
         )
         
-        content = response.choices[0].message.content.strip()
-        
-        # Remove markdown code blocks if present
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-        
-        try:
-            return json.loads(content)
-        except json.JSONDecodeError:
-            # Fallback structure
-            return {
-                "shared_companies": [],
-                "shared_schools": [],
-                "shared_industries": [],
-                "skill_overlap": [],
-                "alignment": "",
-                "personalization_hook_options": []
-            }
-
+        return result.model_dump()
@@ -1,19 +1,46 @@
 """RefinementAgent - Refines messages based on free-text instructions."""
-from openai import OpenAI
-import os
 try:
+    from backend.logic.clients import get_openai_client
+    from backend.logic.llm import chat_completion
+    from backend.logic.profiling import profiled
+    from backend.logic.prompts import PromptTemplate
     from backend.logic.sanitizer import enforce_character_limit
 except ImportError:
+    from logic.clients import get_openai_client
+    from logic.llm import chat_completion
+    from logic.profiling import profiled
+    from logic.prompts import PromptTemplate
     from logic.sanitizer import enforce_character_limit
 
+REFINE_PROMPT = PromptTemplate(
+    name="refinement",
+    version=1,
+    system="You are a message refinement specialist. Always respect the character limit given with each message. Return only the refined message text.",
+    instructions="""Refine the message in the user message based on the user's instructions while:
+- Preserving personalization and accuracy
+- Maintaining professional tone (unless instructed otherwise)
+- Keeping the core message intact
+- Following the character limit given with the message
+
+Return ONLY the refined message text, nothing else. The message MUST be under the character limit.""",
+    data_template="""Character Limit: {char_limit} characters
+
+Original Message:
+{original_message}
+
+User Instructions:
+{refinement_instructions}"""
+)
+
 
 class RefinementAgent:
     """Agent that refines messages based on user feedback."""
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = get_openai_client()
         self.model = "gpt-4o"
     
+    @profiled("refine")
     def refine(
         self,
         original_message: str,
@@ -25,28 +52,15 @@ class RefinementAgent:
         # Determine character limit based on message type
         char_limit = 300 if message_type == "linkedin" else 1200
         
-        prompt = f"""Refine this message based on the user's instructions.
-
-Original Message:
-{original_message}
-
-User Instructions:
-{refinement_instructions}
-
-Refine the message according to the instructions while:
-- Preserving personalization and accuracy
-- Maintaining professional tone (unless instructed otherwise)
-- Keeping the core message intact
-- Following the character limit of {char_limit} characters
-
-Return ONLY the refined message text, nothing else. The message MUST be under {char_limit} characters."""
-
-        response = self.client.chat.completions.create(
+        response = chat_completion(
+            self.client,
+            REFINE_PROMPT,
             model=self.model,
-            messages=[
-                {"role": "system", "content": f"You are a message refinement specialist. Always respect the {char_limit} character limit. Return only the refined message text."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=REFINE_PROMPT.render(
+                char_limit=char_limit,
+                original_message=original_message,
+                refinement_instructions=refinement_instructions
+            ),
             temperature=0.7
         )
         
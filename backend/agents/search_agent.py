@@ -1,7 +1,25 @@
 """SearchAgent - Uses Exa Search API to find relevant company/role insights."""
 from exa_py import Exa
 import os
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
+try:
+    from backend.logic.cache import get_cache
+    from backend.logic.circuit_breaker import CircuitBreaker, CircuitOpenError
+    from backend.logic.clients import wrap_search_client
+    from backend.logic.profiling import profiled
+    from backend.logic.transport import REPLAY, transport_mode
+except ImportError:
+    from logic.cache import get_cache
+    from logic.circuit_breaker import CircuitBreaker, CircuitOpenError
+    from logic.clients import wrap_search_client
+    from logic.profiling import profiled
+    from logic.transport import REPLAY, transport_mode
+
+# How long a query's results are reused
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("CACHE_SEARCH_TTL_SECONDS", "86400"))
+# How long a query that found nothing is skipped before retrying it
+NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_NEGATIVE_CACHE_TTL_SECONDS", "300"))
 
 
 class SearchAgent:
@@ -9,10 +27,38 @@ class SearchAgent:
     
     def __init__(self):
         api_key = os.getenv("EXA_API_KEY")
-        if not api_key:
+        if not api_key and transport_mode() != REPLAY:
             raise ValueError("EXA_API_KEY environment variable not set")
-        self.client = Exa(api_key=api_key)
+        self.client = wrap_search_client(Exa(api_key=api_key or "replay"))
+        self.breaker = CircuitBreaker(
+            "exa",
+            failure_threshold=int(os.getenv("SEARCH_BREAKER_FAILURES", "3")),
+            slow_call_seconds=float(os.getenv("SEARCH_BREAKER_SLOW_SECONDS", "5")),
+            reset_timeout_seconds=float(os.getenv("SEARCH_BREAKER_RESET_SECONDS", "30")),
+            call_timeout_seconds=float(os.getenv("SEARCH_TIMEOUT_SECONDS", "5"))
+        )
+        # Results per query; queries that found nothing are stored as [] with a shorter TTL
+        self.cache = get_cache().namespace("search", SEARCH_CACHE_TTL_SECONDS)
+        self._negative_lock = threading.Lock()
+        self._negative_hits = 0
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Return circuit breaker state and negative cache stats."""
+        with self._negative_lock:
+            hits = self._negative_hits
+        return {**self.breaker.metrics(), "negative_cache_hits": hits}
+    
+    def _cached_results(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        results = self.cache.get(query)
+        if results == []:
+            with self._negative_lock:
+                self._negative_hits += 1
+        return results
     
+    def _cache_negative(self, query: str) -> None:
+        self.cache.set(query, [], ttl_seconds=NEGATIVE_CACHE_TTL_SECONDS)
+    
+    @profiled("search")
     def search(self, target_profile: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Search for relevant company news and role insights."""
         results = []
@@ -53,24 +99,39 @@ class SearchAgent:
         
         # Execute searches (limit to top 1-3 results)
         for query in queries[:2]:  # Limit to 2 queries
+            cached = self._cached_results(query)
+            if cached is not None:
+                results.extend(cached)
+                continue
             try:
-                search_results = self.client.search(
+                search_results = self.breaker.call(lambda: self.client.search(
                     query=query,
                     num_results=2,
                     use_autoprompt=True
-                )
-                
-                for result in search_results.results[:2]:  # Top 2 per query
-                    results.append({
-                        "title": result.title or "",
-                        "url": result.url or "",
-                        "summary": result.text[:200] if result.text else "",  # Brief summary
-                        "query": query
-                    })
+                ))
+            except CircuitOpenError:
+                # Exa is degraded; skip search instead of waiting on it
+                break
             except Exception as e:
-                # If Exa fails, continue without results
+                # If Exa fails, continue without results. Failures aren't cached:
+                # the breaker handles an outage, and a blip shouldn't hide the query
                 print(f"Exa search error: {e}")
                 continue
+            
+            if not search_results.results:
+                self._cache_negative(query)
+                continue
+            query_results = [
+                {
+                    "title": result.title or "",
+                    "url": result.url or "",
+                    "summary": result.text[:200] if result.text else "",  # Brief summary
+                    "query": query
+                }
+                for result in search_results.results[:2]  # Top 2 per query
+            ]
+            self.cache.set(query, query_results)
+            results.extend(query_results)
         
         # Return top 1-3 items
         return results[:3]
@@ -0,0 +1,74 @@
+"""Per-user outreach aggregates, kept up to date one history entry at a time."""
+from typing import Any, Dict, List, Optional
+try:
+    from backend.logic.connection_templates import available_hooks
+except ImportError:
+    from logic.connection_templates import available_hooks
+
+DIMENSIONS = ("company", "industry", "hook")
+
+
+def empty_aggregates() -> Dict[str, Any]:
+    return {"totals": {"total": 0, "by_status": {}}, **{dimension: {} for dimension in DIMENSIONS}}
+
+
+def entry_dimensions(entry: Dict[str, Any]) -> Dict[str, List[str]]:
+    """The company, industries and hook type an entry is counted under."""
+    target_profile = entry.get("target_profile") or {}
+    company = entry.get("contact_company")
+    if not company:
+        work_history = target_profile.get("work_history") or []
+        company = work_history[0].get("company") if work_history else None
+
+    industries = []
+    for industry in target_profile.get("industries") or []:
+        industry = str(industry).strip()
+        if industry and industry not in industries:
+            industries.append(industry)
+
+    # The strongest hook the overlap offered, as ranked for template drafts
+    hook = next(iter(available_hooks(entry.get("overlap_summary") or {}, entry.get("context_attributes") or {})))
+
+    return {
+        "company": [str(company).strip()] if company and str(company).strip() else [],
+        "industry": industries,
+        "hook": [hook]
+    }
+
+
+def apply_entry(aggregates: Dict[str, Any], entry: Optional[Dict[str, Any]], sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) one entry's contribution."""
+    if not entry:
+        return
+    status = entry.get("status") or "draft"
+    totals = aggregates["totals"]
+    totals["total"] += sign
+    totals["by_status"][status] = totals["by_status"].get(status, 0) + sign
+
+    for dimension, values in entry_dimensions(entry).items():
+        buckets = aggregates[dimension]
+        for value in values:
+            bucket = buckets.setdefault(value, {"total": 0, "by_status": {}})
+            bucket["total"] += sign
+            bucket["by_status"][status] = bucket["by_status"].get(status, 0) + sign
+            if bucket["total"] <= 0:
+                del buckets[value]
+
+
+def _rates(counts: Dict[str, Any]) -> Dict[str, Any]:
+    accepted = counts["by_status"].get("accepted", 0)
+    return {
+        "total": counts["total"],
+        "accepted": accepted,
+        "acceptance_rate": round(accepted / counts["total"], 3) if counts["total"] else 0.0,
+        "by_status": {status: n for status, n in counts["by_status"].items() if n}
+    }
+
+
+def summarize(aggregates: Dict[str, Any], top: int) -> Dict[str, Any]:
+    """Acceptance rates overall and for the top values of each dimension by volume."""
+    summary = {"totals": _rates(aggregates["totals"])}
+    for dimension in DIMENSIONS:
+        ranked = sorted(aggregates[dimension].items(), key=lambda item: (-item[1]["total"], item[0]))
+        summary[dimension] = [{"name": name, **_rates(counts)} for name, counts in ranked[:top]]
+    return summary
@@ -0,0 +1,316 @@
+"""Namespaced cache with in-memory, SQLite and Redis backends."""
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+DEFAULT_SQLITE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache.sqlite3"
+)
+
+_MISSING = object()
+
+
+def cache_key(*parts: Any) -> str:
+    """Hash the parts a cached value depends on into a fixed-length key."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class MemoryBackend:
+    """LRU cache local to one process, bounded by total value bytes."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(value) > self.max_bytes:
+                return
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        self._bytes -= len(self._entries.pop(key)[1])
+
+    def usage(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+class SQLiteBackend:
+    """
+    Cache in a SQLite file, shared by every worker process on the host.
+
+    Each thread gets its own connection; WAL mode lets readers proceed while
+    another process writes. Triggers keep the total size in a one-row table,
+    so writes don't scan the cache. When the total passes max_bytes, expired
+    rows go first, then the oldest writes until it is back under 90%.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, "
+                "size INTEGER NOT NULL, stored REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_stored ON cache (stored)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+            # Seeded once, for cache files written before the size table existed
+            conn.execute("INSERT OR IGNORE INTO cache_size VALUES (0, (SELECT COALESCE(SUM(size), 0) FROM cache))")
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_insert AFTER INSERT ON cache "
+                "BEGIN UPDATE cache_size SET total = total + NEW.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_update AFTER UPDATE OF size ON cache "
+                "BEGIN UPDATE cache_size SET total = total + NEW.size - OLD.size WHERE id = 0; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_size_delete AFTER DELETE ON cache "
+                "BEGIN UPDATE cache_size SET total = total - OLD.size WHERE id = 0; END"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete doesn't fire triggers
+        conn.execute(
+            "INSERT INTO cache (key, value, expires, size, stored) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, "
+            "size = excluded.size, stored = excluded.stored",
+            (key, value, now + ttl_seconds, len(value), now)
+        )
+        total = conn.execute("SELECT total FROM cache_size WHERE id = 0").fetchone()[0]
+        if total > self.max_bytes:
+            conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+            # Drop the oldest writes until the newest rows fit in 90% of max_bytes
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY stored DESC) AS running FROM cache) "
+                "WHERE running > ?)",
+                (int(self.max_bytes * 0.9),)
+            )
+
+    def delete(self, key: str) -> None:
+        self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def usage(self) -> Dict[str, Any]:
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE expires > ?", (time.time(),)
+        ).fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "path": self.path}
+
+
+class RedisBackend:
+    """Cache on a Redis-protocol server (Redis, Valkey, KeyDB), shared across hosts."""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "outreach:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis needs the redis package")
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        # An unreachable server would cost every cache lookup its socket timeouts
+        try:
+            self._client.ping()
+        except redis.RedisError as e:
+            raise RuntimeError(f"cannot reach {url}: {e}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        self._client.set(self.prefix + key, value, ex=max(1, math.ceil(ttl_seconds)))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def usage(self) -> Dict[str, Any]:
+        # Stored size is the server's business; per-namespace byte counts still apply
+        return {}
+
+
+class CacheNamespace:
+    """A group of keys with one TTL, holding JSON-serializable values."""
+
+    def __init__(self, cache: "Cache", name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "errors": 0, "bytes_read": 0, "bytes_written": 0}
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for field, delta in deltas.items():
+                self._stats[field] += delta
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            raw = self._cache.backend.get(f"{self.name}:{key}")
+        except Exception as e:
+            # A broken cache only costs the recomputation, never the request
+            print(f"Cache read failed ({self.name}): {e}")
+            self._count(errors=1, misses=1)
+            return default
+        if raw is None:
+            self._count(misses=1)
+            return default
+        self._count(hits=1, bytes_read=len(raw))
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        try:
+            self._cache.backend.set(f"{self.name}:{key}", raw, ttl_seconds or self.ttl_seconds)
+        except Exception as e:
+            print(f"Cache write failed ({self.name}): {e}")
+            self._count(errors=1)
+            return
+        self._count(sets=1, bytes_written=len(raw))
+
+    def delete(self, key: str) -> None:
+        try:
+            self._cache.backend.delete(f"{self.name}:{key}")
+        except Exception as e:
+            print(f"Cache delete failed ({self.name}): {e}")
+            self._count(errors=1)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+class Cache:
+    """
+    Front end over one backend, handing out namespaces.
+
+    Hit and byte counters are per process; the backend's usage() reports
+    what is actually stored.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._namespaces: Dict[str, CacheNamespace] = {}
+        self._lock = threading.Lock()
+
+    def namespace(self, name: str, ttl_seconds: float) -> CacheNamespace:
+        with self._lock:
+            if name not in self._namespaces:
+                self._namespaces[name] = CacheNamespace(self, name, ttl_seconds)
+            return self._namespaces[name]
+
+    def metrics(self) -> Dict[str, Any]:
+        try:
+            usage = self.backend.usage()
+        except Exception as e:
+            usage = {"error": str(e)}
+        with self._lock:
+            namespaces = {name: ns.metrics() for name, ns in self._namespaces.items()}
+        return {"backend": self.backend.name, **usage, "namespaces": namespaces}
+
+
+def _create_backend():
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    max_bytes = int(float(os.getenv("CACHE_MAX_MB", "64")) * 1024 * 1024)
+    try:
+        if kind == "sqlite":
+            return SQLiteBackend(os.getenv("CACHE_PATH", DEFAULT_SQLITE_PATH), max_bytes)
+        if kind == "redis":
+            return RedisBackend(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    except (RuntimeError, sqlite3.Error, OSError) as e:
+        print(f"Warning: {kind} cache unavailable ({e}); using the in-memory cache")
+    return MemoryBackend(max_bytes)
+
+
+_cache: Optional[Cache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Return the process-wide cache, configured by CACHE_BACKEND on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = Cache(_create_backend())
+        return _cache
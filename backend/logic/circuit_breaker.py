@@ -0,0 +1,131 @@
+"""Circuit breaker for calls to flaky external services."""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the service while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a service after repeated failures or slow calls.
+
+    After failure_threshold consecutive failures (a call slower than
+    slow_call_seconds counts as one) the circuit opens and calls fail fast
+    with CircuitOpenError. After reset_timeout_seconds it goes half-open and
+    lets up to half_open_max_calls probes through; a successful probe closes
+    it again, a failed one reopens it.
+
+    With call_timeout_seconds set, calls run on a small worker pool and the
+    caller stops waiting after that long; the call counts as a failure and
+    TimeoutError is raised, so a hung service trips the breaker instead of
+    blocking its callers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        slow_call_seconds: float = 5.0,
+        reset_timeout_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        call_timeout_seconds: Optional[float] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.call_timeout_seconds = call_timeout_seconds
+        self._executor = (
+            ThreadPoolExecutor(max_workers=4, thread_name_prefix=f"{name}-call") if call_timeout_seconds else None
+        )
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "timeouts": 0, "rejected": 0, "times_opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Call fn() unless the circuit is open."""
+        self._before_call()
+        start = time.monotonic()
+        try:
+            if self._executor is None:
+                result = fn()
+            else:
+                future = self._executor.submit(contextvars.copy_context().run, fn)
+                try:
+                    result = future.result(timeout=self.call_timeout_seconds)
+                except FuturesTimeoutError:
+                    with self._lock:
+                        self._stats["timeouts"] += 1
+                    # The call is left to finish on its worker; nobody waits for it
+                    raise TimeoutError(f"{self.name} call took longer than {self.call_timeout_seconds}s")
+        except Exception:
+            self._after_call(success=False, slow=False)
+            raise
+        slow = time.monotonic() - start > self.slow_call_seconds
+        self._after_call(success=not slow, slow=slow)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                **self._stats
+            }
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+
+    def _before_call(self) -> None:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN or (
+                self._state == HALF_OPEN and self._half_open_in_flight >= self.half_open_max_calls
+            ):
+                self._stats["rejected"] += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight += 1
+            self._stats["calls"] += 1
+
+    def _after_call(self, success: bool, slow: bool) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if slow:
+                self._stats["slow_calls"] += 1
+            if success:
+                self._consecutive_failures = 0
+                self._state = CLOSED
+                return
+
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._stats["times_opened"] += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,73 @@
+"""Shared provider clients, optionally backed by the record/replay transport."""
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import OpenAI
+try:
+    from backend.logic.transport import (
+        OFF, REPLAY, Cassette, RecordReplaySearchClient, RecordReplayTransport, Redactor, transport_mode
+    )
+except ImportError:
+    from logic.transport import (
+        OFF, REPLAY, Cassette, RecordReplaySearchClient, RecordReplayTransport, Redactor, transport_mode
+    )
+
+DEFAULT_CASSETTE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cassettes", "traffic.jsonl.gz"
+)
+
+_lock = threading.Lock()
+_openai_client: Optional[OpenAI] = None
+_cassette: Optional[Cassette] = None
+
+
+def _replay_options() -> Dict[str, Any]:
+    return {
+        "redact": Redactor(os.getenv("LLM_CASSETTE_REDACT") or None),
+        "latency_scale": float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "1.0")),
+        "route_fallback": os.getenv("LLM_REPLAY_STRICT", "").lower() not in ("1", "true", "yes")
+    }
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the cassette for LLM_TRANSPORT_MODE=record/replay, loading it once."""
+    global _cassette
+    if transport_mode() == OFF:
+        return None
+    with _lock:
+        if _cassette is None:
+            _cassette = Cassette(os.getenv("LLM_CASSETTE_PATH", DEFAULT_CASSETTE_PATH))
+            _cassette.load()
+        return _cassette
+
+
+def get_openai_client() -> OpenAI:
+    """Return the OpenAI client shared by all agents."""
+    global _openai_client
+    cassette = get_cassette()
+    with _lock:
+        if _openai_client is None:
+            mode = transport_mode()
+            http_client = None
+            if cassette is not None:
+                http_client = httpx.Client(transport=RecordReplayTransport(mode, cassette, **_replay_options()))
+            api_key = os.getenv("OPENAI_API_KEY") or ("replay" if mode == REPLAY else None)
+            _openai_client = OpenAI(api_key=api_key, http_client=http_client)
+        return _openai_client
+
+
+def wrap_search_client(client):
+    """Wrap an Exa client for record/replay, or return it unchanged."""
+    cassette = get_cassette()
+    if cassette is None:
+        return client
+    return RecordReplaySearchClient(client, transport_mode(), cassette, **_replay_options())
+
+
+def transport_metrics() -> Dict[str, Any]:
+    cassette = get_cassette()
+    if cassette is None:
+        return {"mode": OFF}
+    return {"mode": transport_mode(), **cassette.metrics()}
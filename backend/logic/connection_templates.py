@@ -0,0 +1,230 @@
+"""LinkedIn connection requests drafted from templates, without an LLM."""
+import hashlib
+import random
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+try:
+    from backend.logic.sanitizer import enforce_character_limit
+except ImportError:
+    from logic.sanitizer import enforce_character_limit
+
+LINKEDIN_LIMIT = 300
+
+# Hooks in order of preference: a shared employer beats a shared skill
+HOOK_ORDER = ("company", "school", "context", "industry", "skill", "generic")
+
+TEMPLATES: Dict[str, List[Tuple[str, str]]] = {
+    "company": [
+        ("company-1", "Hi {name}, I noticed we've both spent time at {company}. {goal}"),
+        ("company-2", "Hi {name} – fellow {company} alum here! {goal}"),
+        ("company-3", "Hi {name}, always great to meet someone else from {company}. {goal}"),
+    ],
+    "school": [
+        ("school-1", "Hi {name}, I saw we both went to {school}. {goal}"),
+        ("school-2", "Hi {name} – fellow {school} alum here! {goal}"),
+        ("school-3", "Hi {name}, it's always nice to come across another {school} grad. {goal}"),
+    ],
+    "context": [
+        ("context-1", "Hi {name} – {context}. {goal}"),
+        ("context-2", "Hi {name}, reaching out with this in mind: {context}. {goal}"),
+    ],
+    "industry": [
+        ("industry-1", "Hi {name}, I'm also working in {industry} and enjoyed reading about your path. {goal}"),
+        ("industry-2", "Hi {name}, always glad to connect with others in {industry}. {goal}"),
+        ("industry-3", "Hi {name}, your background in {industry} caught my eye since I work in the space too. {goal}"),
+    ],
+    "skill": [
+        ("skill-1", "Hi {name}, I noticed we share an interest in {skill}. {goal}"),
+        ("skill-2", "Hi {name}, it's great to find someone else who works with {skill}. {goal}"),
+    ],
+    "generic": [
+        ("generic-1", "Hi {name}, I came across your profile and was impressed by your work. {goal}"),
+        ("generic-2", "Hi {name}, your background really stood out to me. {goal}"),
+        ("generic-3", "Hi {name}, I enjoyed reading about your experience. {goal}"),
+    ],
+}
+
+# Closing sentence per parse_context_note outreach_goal
+GOALS: Dict[str, List[str]] = {
+    "coffee chat or meeting": [
+        "Would you be open to a quick coffee chat sometime?",
+        "I'd love to grab a virtual coffee if you're open to it.",
+    ],
+    "explore their role/team": [
+        "I'd love to hear more about your role and team.",
+        "Would love to connect and learn how your team works.",
+    ],
+    "learn about their work": [
+        "I'd love to connect and learn more about your work.",
+        "Would be great to connect and hear what you're working on.",
+    ],
+}
+
+# Templates that only read right when neither person still works at the company
+PAST_ONLY = {"company-2"}
+
+# Used when every candidate runs over LINKEDIN_LIMIT, e.g. with a very long name
+FALLBACK_TEMPLATE = ("fallback", "Hi {name}, I'd love to connect.")
+
+# Work history durations that mark a current role
+_CURRENT_MARKERS = ("present", "current", "now")
+
+VARIETIES = ("rotate", "random", "stable")
+
+
+def _lower_set(values: List[str]) -> Dict[str, str]:
+    return {v.strip().lower(): v.strip() for v in values if v and v.strip()}
+
+
+def local_overlap(user_profile: Dict[str, Any], target_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Exact-match overlap of two extracted profiles, in the OverlapAgent's shape."""
+    def shared(field: str, key: Optional[str] = None) -> List[str]:
+        def values(profile: Dict[str, Any]) -> List[str]:
+            items = profile.get(field) or []
+            return [str(item.get(key) or "") for item in items] if key else [str(item) for item in items]
+        user_values = _lower_set(values(user_profile))
+        return [value for lower, value in _lower_set(values(target_profile)).items() if lower in user_values]
+
+    return {
+        "shared_companies": shared("work_history", "company"),
+        "shared_schools": shared("education", "school"),
+        "shared_industries": shared("industries"),
+        "skill_overlap": shared("skills"),
+        "alignment": "",
+        "personalization_hook_options": []
+    }
+
+
+def current_companies(*profiles: Dict[str, Any]) -> Set[str]:
+    """Lowercased names of the companies where anyone in profiles still works."""
+    companies = set()
+    for profile in profiles:
+        for item in profile.get("work_history") or []:
+            duration = str(item.get("duration") or "").lower()
+            if item.get("company") and any(marker in duration for marker in _CURRENT_MARKERS):
+                companies.add(str(item["company"]).strip().lower())
+    return companies
+
+
+def _context_text(context_attributes: Dict[str, Any]) -> str:
+    """The user's own note, if parse_context_note kept one, as a clause."""
+    text = context_attributes.get("personal_hook") or ""
+    if not text and context_attributes.get("connection_context") != "no prior connection":
+        text = context_attributes.get("connection_context") or ""
+    text = text.strip().rstrip(".!")
+    if text.lower().startswith("met "):
+        text = "great to have met you " + text[4:]
+    return text[:1].upper() + text[1:]
+
+
+def available_hooks(overlap_summary: Dict[str, Any], context_attributes: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """Return {hook: template fields} for every hook this pair of profiles supports, in HOOK_ORDER."""
+    candidates = {
+        "company": ("company", overlap_summary.get("shared_companies")),
+        "school": ("school", overlap_summary.get("shared_schools")),
+        "context": ("context", [_context_text(context_attributes)]),
+        "industry": ("industry", overlap_summary.get("shared_industries")),
+        "skill": ("skill", overlap_summary.get("skill_overlap")),
+    }
+    hooks = {}
+    for hook in HOOK_ORDER[:-1]:
+        field, values = candidates[hook]
+        values = [v for v in (values or []) if v]
+        if values:
+            hooks[hook] = {field: values[0]}
+    hooks["generic"] = {}
+    return hooks
+
+
+class ConnectionTemplates:
+    """
+    Fills connection-request templates from an overlap summary and context attributes.
+
+    variety picks among the templates for the best hook: "rotate" cycles
+    through them per user so consecutive requests read differently,
+    "random" draws from every available hook, and "stable" always gives the
+    same message for the same target. Rotation is tracked per process, for
+    the max_rotations most recently used (user, hook) pairs.
+    """
+
+    def __init__(self, max_rotations: int = 10000):
+        self.max_rotations = max_rotations
+        self._lock = threading.Lock()
+        self._rotation: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+
+    def _next_offset(self, uuid: str, hook: str, count: int) -> int:
+        with self._lock:
+            offset = self._rotation.pop((uuid, hook), 0)
+            self._rotation[(uuid, hook)] = offset + count
+            while len(self._rotation) > self.max_rotations:
+                self._rotation.popitem(last=False)
+        return offset
+
+    def draft(
+        self,
+        uuid: str,
+        first_name: Optional[str],
+        overlap_summary: Dict[str, Any],
+        context_attributes: Dict[str, Any],
+        variety: str = "rotate",
+        count: int = 1,
+        seed: str = "",
+        current: Optional[Set[str]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Return up to count distinct connection requests as [{message, template_id, hook}].
+
+        current holds lowercased companies either person still works at (see
+        current_companies); PAST_ONLY templates are skipped for those. At least
+        one request is always returned.
+        """
+        hooks = available_hooks(overlap_summary, context_attributes)
+        goal = context_attributes.get("outreach_goal") or "learn about their work"
+        goals = GOALS.get(goal, GOALS["learn about their work"])
+
+        # "Fellow alum" reads wrong for a company someone still works at
+        company = hooks.get("company", {}).get("company", "")
+        if company.strip().lower() in (current or set()):
+            templates = {**TEMPLATES, "company": [t for t in TEMPLATES["company"] if t[0] not in PAST_ONLY]}
+        else:
+            templates = TEMPLATES
+
+        # Templates for the best hook first, then the others as fallbacks
+        best_hook = next(iter(hooks))
+        ordered = [(hook, template) for hook in hooks for template in templates[hook]]
+        best = ordered[:len(templates[best_hook])]
+        if variety == "random":
+            choices = random.sample(ordered, len(ordered))
+            goal_offset = random.randrange(len(goals))
+        elif variety == "stable":
+            digest = int(hashlib.sha256(seed.encode("utf-8")).hexdigest(), 16)
+            start = digest % len(best)
+            choices = best[start:] + best[:start] + ordered[len(best):]
+            goal_offset = digest % len(goals)
+        else:
+            start = self._next_offset(uuid, best_hook, count) % len(best)
+            choices = best[start:] + best[:start] + ordered[len(best):]
+            goal_offset = start
+
+        drafts = []
+        for index, (hook, (template_id, template)) in enumerate(choices):
+            message = template.format(
+                name=first_name or "[Name]",
+                goal=goals[(goal_offset + index) % len(goals)],
+                **hooks[hook]
+            )
+            if len(message) <= LINKEDIN_LIMIT:
+                drafts.append({"message": message, "template_id": template_id, "hook": hook})
+            if len(drafts) == count:
+                break
+
+        if not drafts:
+            template_id, template = FALLBACK_TEMPLATE
+            # Leave room for the "..." enforce_character_limit may append
+            message = enforce_character_limit(template.format(name=first_name or "[Name]"), LINKEDIN_LIMIT - 3)
+            drafts.append({"message": message, "template_id": template_id, "hook": "generic"})
+        return drafts
+
+
+connection_templates = ConnectionTemplates()
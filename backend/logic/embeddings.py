@@ -1,17 +1,28 @@
 """Embedding generation utilities."""
-from openai import OpenAI
-import os
 from typing import List
+try:
+    from backend.logic.clients import get_openai_client
+    from backend.logic.profiling import profiled
+    from backend.logic.quotas import quota_tracker
+    from backend.logic.scheduler import current_request_context, llm_scheduler
+except ImportError:
+    from logic.clients import get_openai_client
+    from logic.profiling import profiled
+    from logic.quotas import quota_tracker
+    from logic.scheduler import current_request_context, llm_scheduler
 
 
+@profiled("embedding")
 def generate_embedding(text: str) -> List[float]:
     """Generate embedding using text-embedding-3-large."""
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    client = get_openai_client()
     
-    response = client.embeddings.create(
+    response = llm_scheduler.run(lambda: client.embeddings.create(
         model="text-embedding-3-large",
         input=text
-    )
+    ))
+    usage = getattr(response, "usage", None)
+    quota_tracker.record_tokens(current_request_context()[0], getattr(usage, "total_tokens", 0) or 0)
     
     return response.data[0].embedding
 
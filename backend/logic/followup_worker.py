@@ -0,0 +1,55 @@
+"""Background pre-generation of follow-up messages for draft outreach."""
+import hashlib
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+def followup_inputs_hash(entry: Dict[str, Any], user_profile: Dict[str, Any]) -> str:
+    """Hash the inputs FollowUpAgent uses, so stale candidates can be detected."""
+    payload = {
+        "user_profile": user_profile,
+        "target_profile": entry.get("target_profile", {}),
+        "linkedin_connection_request": entry.get("linkedin_connection_request", ""),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class FollowUpPregenerator:
+    """
+    Single worker thread that pre-generates follow-ups while the service is idle.
+
+    Jobs are (uuid, history_id) pairs. Before each job the worker waits until
+    is_idle() returns True, so pre-generation never competes with requests a
+    user is waiting on.
+    """
+
+    def __init__(self, generate: Callable[[str, str], None], is_idle: Callable[[], bool], idle_poll_seconds: float = 1.0):
+        self._generate = generate
+        self._is_idle = is_idle
+        self._idle_poll_seconds = idle_poll_seconds
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="followup-pregen", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def enqueue(self, uuid: str, history_id: str) -> None:
+        self._queue.put((uuid, history_id))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            uuid, history_id = self._queue.get()
+            while not self._is_idle():
+                time.sleep(self._idle_poll_seconds)
+            try:
+                self._generate(uuid, history_id)
+            except Exception as e:
+                print(f"Follow-up pre-generation failed for {history_id}: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,137 @@
+"""Compressed archive segments for older history entries."""
+import gzip
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = "archive"
+INDEX_FILE = "index.json"
+
+
+def _codec() -> str:
+    """zstd when the zstandard package is installed, unless HISTORY_ARCHIVE_CODEC=gzip."""
+    requested = os.getenv("HISTORY_ARCHIVE_CODEC", "zstd").lower()
+    return "zstd" if requested == "zstd" and zstandard is not None else "gzip"
+
+
+def _open_segment(path: Path, mode: str, use_zstd: bool):
+    if use_zstd:
+        if zstandard is None:
+            raise RuntimeError(f"{path.name} needs the zstandard package to read")
+        if mode == "r":
+            return zstandard.open(path, "rt", encoding="utf-8")
+        return zstandard.open(path, "wt", encoding="utf-8", cctx=zstandard.ZstdCompressor(level=10))
+    return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+
+
+def read_segment(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a segment one at a time."""
+    with _open_segment(path, "r", path.name.endswith(".zst")) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def open_segment(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Open a segment now and return an iterator over its entries.
+
+    Reading goes on from the open file even if the segment is replaced or
+    deleted in the meantime.
+    """
+    return _read_lines(_open_segment(path, "r", path.name.endswith(".zst")))
+
+
+def _read_lines(f) -> Iterator[Dict[str, Any]]:
+    with f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_segment(directory: Path, name: str, entries: Iterable[Dict[str, Any]]) -> str:
+    """Write entries to a new segment file atomically and return its file name."""
+    directory.mkdir(parents=True, exist_ok=True)
+    use_zstd = _codec() == "zstd"
+    file_name = f"{name}.jsonl.{'zst' if use_zstd else 'gz'}"
+    tmp_path = directory / f".{file_name}.tmp"
+    with _open_segment(tmp_path, "w", use_zstd) as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, directory / file_name)
+    return file_name
+
+
+def load_index(user_dir: Path) -> List[Dict[str, Any]]:
+    """Return the user's segments, oldest first: [{file, count, ids, first_timestamp, last_timestamp, max_version}]."""
+    index_file = user_dir / ARCHIVE_DIR / INDEX_FILE
+    if not index_file.exists():
+        return []
+    with open(index_file, "r") as f:
+        return json.load(f)
+
+
+def save_index(user_dir: Path, segments: List[Dict[str, Any]]) -> None:
+    archive_dir = user_dir / ARCHIVE_DIR
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    tmp_file = archive_dir / f".{INDEX_FILE}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(segments, f, separators=(",", ":"))
+    os.replace(tmp_file, archive_dir / INDEX_FILE)
+
+
+def segment_record(file_name: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    timestamps = [e.get("timestamp", "") for e in entries]
+    return {
+        "file": file_name,
+        "count": len(entries),
+        "ids": [e.get("id") for e in entries],
+        "first_timestamp": min(timestamps, default=""),
+        "last_timestamp": max(timestamps, default=""),
+        "max_version": max((e.get("version", 0) for e in entries), default=0)
+    }
+
+
+class HistoryCompactor:
+    """
+    Background thread that periodically runs compact(uuid) for every user.
+
+    Failures are logged per user so one bad history file doesn't stop the
+    rest from being compacted.
+    """
+
+    def __init__(self, compact: Callable[[str], int], list_users: Callable[[], List[str]], interval_seconds: float):
+        self._compact = compact
+        self._list_users = list_users
+        self._interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="history-compactor", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> int:
+        """Compact every user now and return the number of entries archived."""
+        archived = 0
+        for uuid in self._list_users():
+            try:
+                archived += self._compact(uuid)
+            except Exception as e:
+                print(f"History compaction failed for {uuid}: {e}")
+        return archived
+
+    def _run(self) -> None:
+        while True:
+            self.run_once()
+            if self._stop.wait(self._interval_seconds):
+                return
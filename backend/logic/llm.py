@@ -0,0 +1,85 @@
+"""Single entry point for chat completions made by the agents."""
+import threading
+import time
+from typing import Any, Dict
+try:
+    from backend.logic.profiling import stage
+    from backend.logic.prompts import PromptTemplate
+    from backend.logic.quotas import quota_tracker
+    from backend.logic.resilience import DeadlineExceeded, call_with_resilience
+    from backend.logic.scheduler import current_request_context, llm_scheduler
+except ImportError:
+    from logic.profiling import stage
+    from logic.prompts import PromptTemplate
+    from logic.quotas import quota_tracker
+    from logic.resilience import DeadlineExceeded, call_with_resilience
+    from logic.scheduler import current_request_context, llm_scheduler
+
+_usage_lock = threading.Lock()
+_usage: Dict[str, Dict[str, float]] = {}
+
+
+def _record_usage(template: PromptTemplate, response, latency: float) -> None:
+    """Accumulate token usage, including provider-cached prompt tokens, per template."""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    with _usage_lock:
+        stats = _usage.setdefault(template.key, {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "total_latency_ms": 0.0
+        })
+        stats["calls"] += 1
+        stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        stats["cached_tokens"] += getattr(details, "cached_tokens", 0) or 0
+        stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        stats["total_latency_ms"] += latency * 1000
+    
+    # Charge the user the request is running for
+    quota_tracker.record_tokens(current_request_context()[0], getattr(usage, "total_tokens", 0) or 0)
+
+
+def get_usage_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return per-template usage with cache hit ratio and mean latency."""
+    with _usage_lock:
+        snapshot = {key: dict(stats) for key, stats in _usage.items()}
+
+    for stats in snapshot.values():
+        stats["cached_ratio"] = round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0
+        stats["avg_latency_ms"] = round(stats["total_latency_ms"] / stats["calls"], 1) if stats["calls"] else 0.0
+        stats["total_latency_ms"] = round(stats["total_latency_ms"], 1)
+    return snapshot
+
+
+def chat_completion(client, template: PromptTemplate, **params: Any):
+    """
+    Create a chat completion for a prompt template.
+
+    Each attempt goes through the shared scheduler and records its usage; the
+    resilience layer applies the stage deadline, retries, hedging and model
+    fallback around the attempts. The template name is the stage name.
+    """
+    def attempt(model: str, deadline: float, started):
+        start = time.perf_counter()
+        
+        def call():
+            # Time spent queued for a slot counts against the deadline
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"{template.name} did not finish within its deadline")
+            started()
+            # Retries are handled by the resilience layer, not the SDK
+            request_client = client.with_options(max_retries=0, timeout=remaining)
+            return request_client.chat.completions.create(**{**params, "model": model})
+        
+        with stage(f"llm:{template.name}"):
+            try:
+                response = llm_scheduler.run(call, deadline=deadline)
+            except TimeoutError:
+                raise DeadlineExceeded(f"{template.name} did not finish within its deadline")
+        _record_usage(template, response, time.perf_counter() - start)
+        return response
+
+    return call_with_resilience(template.name, params["model"], attempt)
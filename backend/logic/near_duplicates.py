@@ -0,0 +1,142 @@
+"""MinHash/LSH fingerprints for spotting near-duplicate target profiles."""
+import hashlib
+import json
+import random
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+_WORD = re.compile(r"\w+")
+
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _shingle_hashes(text: str) -> List[int]:
+    words = _WORD.findall(text.lower())
+    if len(words) > SHINGLE_WORDS:
+        shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    else:
+        shingles = {" ".join(words)} if words else set()
+    return [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+        for s in shingles
+    ]
+
+
+def signature(text: str) -> Optional[List[int]]:
+    """MinHash signature of the word 3-shingles of text, or None if it has no words."""
+    hashes = _shingle_hashes(text or "")
+    if not hashes:
+        return None
+    return [min((a * x + b) % _PRIME for x in hashes) & _MASK for a, b in _PERMUTATIONS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def _band_keys(sig: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(band, tuple(sig[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class _UserIndex:
+    def __init__(self):
+        self.offset = 0
+        self.signatures: Dict[str, List[int]] = {}
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+
+    def add(self, entry_id: str, sig: List[int]) -> None:
+        if entry_id in self.signatures:
+            return
+        self.signatures[entry_id] = sig
+        for key in _band_keys(sig):
+            self.buckets.setdefault(key, []).append(entry_id)
+
+
+class FingerprintIndex:
+    """
+    Per-user LSH index over history entries, persisted as fingerprints.jsonl.
+
+    Each user's index is loaded into memory on first use. Writers append
+    one line per entry. Readers pick up lines appended by other workers by
+    checking the file size, so a query costs one stat plus the bucket lookups.
+    """
+
+    FILE_NAME = "fingerprints.jsonl"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: Dict[Path, _UserIndex] = {}
+
+    def _load(self, user_dir: Path, rebuild: Callable[[], Iterable[Tuple[str, str]]]) -> _UserIndex:
+        path = user_dir / self.FILE_NAME
+        index = self._users.get(user_dir)
+        if index is None:
+            index = self._users[user_dir] = _UserIndex()
+            if not path.exists():
+                # Histories written before the index existed are fingerprinted once
+                self._append(path, index, rebuild())
+
+        size = path.stat().st_size if path.exists() else 0
+        if size > index.offset:
+            with open(path, "rb") as f:
+                f.seek(index.offset)
+                data = f.read()
+            # Only consume whole lines; a concurrent append may be mid-write
+            complete = data[:data.rfind(b"\n") + 1]
+            for line in complete.splitlines():
+                if line.strip():
+                    record = json.loads(line)
+                    index.add(record["id"], record["sig"])
+            index.offset += len(complete)
+        return index
+
+    def _append(self, path: Path, index: _UserIndex, entries: Iterable[Tuple[str, str]]) -> None:
+        lines = []
+        for entry_id, text in entries:
+            sig = signature(text)
+            if sig is not None and entry_id not in index.signatures:
+                lines.append(json.dumps({"id": entry_id, "sig": sig}, separators=(",", ":")) + "\n")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            f.writelines(lines)
+
+    def add(
+        self,
+        user_dir: Path,
+        entries: Iterable[Tuple[str, str]],
+        rebuild: Callable[[], Iterable[Tuple[str, str]]]
+    ) -> None:
+        """Fingerprint (entry_id, text) pairs. Caller holds the user lock."""
+        with self._lock:
+            index = self._load(user_dir, rebuild)
+            self._append(user_dir / self.FILE_NAME, index, entries)
+            self._load(user_dir, rebuild)
+
+    def query(
+        self,
+        user_dir: Path,
+        text: str,
+        threshold: float,
+        rebuild: Callable[[], Iterable[Tuple[str, str]]]
+    ) -> List[Tuple[str, float]]:
+        """Return (entry_id, similarity) for entries at least threshold similar to text, best first."""
+        sig = signature(text)
+        if sig is None:
+            return []
+        with self._lock:
+            index = self._load(user_dir, rebuild)
+            candidates = {entry_id for key in _band_keys(sig) for entry_id in index.buckets.get(key, ())}
+            scored = [(entry_id, similarity(sig, index.signatures[entry_id])) for entry_id in candidates]
+        return sorted((s for s in scored if s[1] >= threshold), key=lambda s: -s[1])
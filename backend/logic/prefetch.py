@@ -0,0 +1,80 @@
+"""Short-TTL cache for speculatively computed target analyses."""
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def prefetch_key(uuid: str, user_profile: Dict[str, Any], target_profile_text: str, fused: bool) -> str:
+    """Hash everything the analysis depends on, so stale results are never reused."""
+    digest = hashlib.sha256()
+    digest.update(uuid.encode("utf-8"))
+    digest.update(json.dumps(user_profile, sort_keys=True).encode("utf-8"))
+    digest.update(b"fused" if fused else b"split")
+    digest.update(target_profile_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PrefetchCache:
+    """Runs analyses in the background and holds their futures for a short time."""
+
+    def __init__(self, ttl_seconds: float = 120, max_workers: int = 4):
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._entries: Dict[str, Tuple[float, Future]] = {}
+        self._lock = threading.Lock()
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any) -> bool:
+        """Start fn(*args) in the background unless a live result already exists."""
+        with self._lock:
+            self._purge_expired()
+            existing = self._entries.get(key)
+            if existing and not (existing[1].done() and existing[1].exception()):
+                return False
+
+            # Carry request-scoped context (e.g. the caller's uuid) into the worker
+            context = contextvars.copy_context()
+            future = self._executor.submit(context.run, fn, *args)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, future)
+            return True
+
+    def get(self, key: str) -> Optional[Future]:
+        """Return the in-flight or completed future for key, if not expired."""
+        with self._lock:
+            self._purge_expired()
+            entry = self._entries.get(key)
+            return entry[1] if entry else None
+
+    def finished(self, key: str) -> Optional[Any]:
+        """Return the result for key if it has already finished successfully, without waiting."""
+        future = self.get(key)
+        if future and future.done() and not future.cancelled() and future.exception() is None:
+            return future.result()
+        return None
+
+    def claim(self, key: str, timeout: float) -> Optional[Any]:
+        """
+        Return the result for key, waiting up to timeout if it is running.
+
+        A prefetch still queued behind other users' prefetches is cancelled
+        and None returned, since computing it inline is quicker than waiting.
+        Raises concurrent.futures.TimeoutError, or the analysis's own error.
+        """
+        future = self.get(key)
+        if future is None:
+            return None
+        if future.cancel():
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[1] is future:
+                    del self._entries[key]
+            return None
+        return future.result(timeout=timeout)
@@ -0,0 +1,219 @@
+"""Rule-based extraction for well-formed LinkedIn profile text."""
+import re
+from typing import Dict, Any, List, Optional, Tuple
+try:
+    from backend.logic.profile_sections import split_sections, split_lines
+    from backend.logic.schemas import ProfileExtraction
+except ImportError:
+    from logic.profile_sections import split_sections, split_lines
+    from logic.schemas import ProfileExtraction
+
+_MONTH = r"(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\.?"
+_DATE_RANGE = re.compile(
+    rf"^(?:{_MONTH}\s+)?\d{{4}}\s*[-–—]\s*(?:(?:{_MONTH}\s+)?\d{{4}}|Present)(?:\s*·\s*.+)?$",
+    re.IGNORECASE
+)
+_EMPLOYMENT_TYPES = (
+    "full-time", "part-time", "self-employed", "freelance", "contract",
+    "internship", "apprenticeship", "seasonal"
+)
+_TENURE = re.compile(r"^(?:\d+\s+yrs?|\d+\s+mos?)(?:\s+\d+\s+mos?)?$", re.IGNORECASE)
+_WORK_MODES = ("remote", "on-site", "hybrid")
+_SCHOOL_HINT = re.compile(r"universit|college|school|institute|academy|polytechnic|\bMBA\b", re.IGNORECASE)
+_NOISE = re.compile(
+    r"^(?:show all|see more|…see more|endorsed by|\d+ endorsements?|passed linkedin|activities and societies|grade:)|\blogo$",
+    re.IGNORECASE
+)
+
+# Lowercase keyword fragments that indicate an industry. Generic role words
+# ("engineer", "platform") belong to every industry, so they are left out.
+INDUSTRY_KEYWORDS = {
+    "Software": ["software", "saas", "full-stack", "full stack", "frontend", "backend", "devops"],
+    "Artificial Intelligence": ["machine learning", "artificial intelligence", "deep learning", "data scien", " ai "],
+    "Financial Services": ["bank", "fintech", "finance", "investment", "capital", "trading"],
+    "Healthcare": ["health", "medical", "clinical", "hospital", "pharma", "biotech"],
+    "Consulting": ["consult", "advisory"],
+    "Education": ["teacher", "professor", "education", "lecturer"],
+    "Marketing": ["marketing", "brand", "growth market", "seo"],
+    "Sales": ["sales", "account executive", "business development"],
+    "E-commerce": ["e-commerce", "ecommerce", "retail", "marketplace"],
+    "Media": ["media", "journalis", "publishing", "content creat", "content strateg"],
+}
+
+# Lowercase fragments of headlines, roles and skills that mark a technical profile
+_TECHNICAL_KEYWORDS = (
+    "engineer", "developer", "software", "scientist", "research", "architect", "data",
+    "machine learning", "python", "java", "sql", "cloud", "kubernetes", "aws", "devops"
+)
+_CASUAL_WORDS = re.compile(r"\b(?:hey|hi there|lol|love to|fun fact|coffee addict|nerd|geek)\b", re.IGNORECASE)
+_EMOJI = re.compile("[\U0001F300-\U0001FAFF\u2600-\u27BF]")
+
+# Confidence contributed by each successfully parsed part of the profile
+_CONFIDENCE_WEIGHTS = {
+    "header": 0.15,
+    "experience": 0.45,
+    "education": 0.2,
+    "skills": 0.2,
+}
+
+
+def _is_date_range(line: str) -> bool:
+    return bool(_DATE_RANGE.match(line))
+
+
+def _is_employment_detail(line: str) -> bool:
+    """Lines like "Full-time · 5 yrs" or "3 yrs 2 mos" under a grouped company."""
+    parts = [p.strip().lower() for p in line.split("·")]
+    return all(p in _EMPLOYMENT_TYPES or _TENURE.match(p) for p in parts if p)
+
+
+def _is_location(line: str) -> bool:
+    lower = line.lower()
+    return any(mode in lower for mode in _WORK_MODES) or (
+        "," in line and len(line) < 60 and not line.endswith(".")
+    )
+
+
+def _clean_company(line: str) -> str:
+    """Strip a trailing " · Full-time" style employment type from a company line."""
+    parts = [p.strip() for p in line.split("·")]
+    return parts[0] if parts else line
+
+
+def _parse_experience(body: str) -> List[Dict[str, str]]:
+    lines = [line for line in split_lines(body) if not _NOISE.search(line)]
+    date_indices = [i for i, line in enumerate(lines) if _is_date_range(line)]
+
+    entries = []
+    header_starts = []
+    group_company: Optional[str] = None
+    for d in date_indices:
+        above = lines[d - 1] if d >= 1 else ""
+        two_above = lines[d - 2] if d >= 2 else ""
+
+        if "·" in above and not _is_employment_detail(above):
+            # Standard layout: role, "Company · Full-time", dates
+            role, company, start = two_above, _clean_company(above), d - 2
+        else:
+            # Grouped layout: company, "Full-time · 5 yrs", then role/dates pairs
+            start = d - 1
+            if d >= 3 and _is_employment_detail(lines[d - 2]):
+                group_company, start = lines[d - 3], d - 3
+            elif d >= 4 and _is_employment_detail(lines[d - 3]) and _is_location(lines[d - 2]):
+                group_company, start = lines[d - 4], d - 4
+            role, company = above, group_company or ""
+
+        header_starts.append(max(start, 0))
+        entries.append({
+            "company": company,
+            "role": role,
+            "duration": lines[d],
+            "responsibilities": "",
+        })
+
+    # Description lines run from after the dates (and location) to the next entry
+    for n, d in enumerate(date_indices):
+        end = header_starts[n + 1] if n + 1 < len(date_indices) else len(lines)
+        description = lines[d + 1:end]
+        if description and _is_location(description[0]):
+            description = description[1:]
+        entries[n]["responsibilities"] = " ".join(description)
+
+    return [entry for entry in entries if entry["role"] and entry["company"]]
+
+
+def _parse_education(body: str) -> List[Dict[str, str]]:
+    lines = [line for line in split_lines(body) if not _NOISE.search(line)]
+
+    entries: List[Dict[str, str]] = []
+    expecting_school = True
+    for line in lines:
+        if _is_date_range(line) or re.match(r"^\d{4}$", line):
+            expecting_school = True
+            continue
+        if expecting_school or (_SCHOOL_HINT.search(line) and entries and entries[-1]["degree"]):
+            entries.append({"school": line, "degree": "", "field": ""})
+            expecting_school = False
+        elif entries and not entries[-1]["degree"]:
+            degree, _, field = line.partition(",")
+            entries[-1]["degree"] = degree.strip()
+            entries[-1]["field"] = field.strip()
+
+    return entries
+
+
+def _parse_skills(body: str) -> List[str]:
+    skills: List[str] = []
+    for line in split_lines(body):
+        if _NOISE.search(line) or len(line) > 60:
+            continue
+        for skill in re.split(r"\s*[·•]\s*", line):
+            if skill and skill not in skills:
+                skills.append(skill)
+    return skills
+
+
+def _find_industries(text: str) -> List[str]:
+    lower = f" {text.lower()} "
+    return [
+        industry for industry, keywords in INDUSTRY_KEYWORDS.items()
+        if any(keyword in lower for keyword in keywords)
+    ]
+
+
+def _infer_tone(role_text: str, skills: List[str], about: str, work_history: List[Dict[str, str]]) -> Dict[str, bool]:
+    """Approximate the extractor's tone_indicators from roles, skills and the About section."""
+    technical_text = f"{role_text} {' '.join(skills)}".lower()
+    casual = bool(_EMOJI.search(about) or _CASUAL_WORDS.search(about) or about.count("!") >= 2)
+    return {
+        "professional": bool(work_history) or not casual,
+        "casual": casual,
+        "technical": any(keyword in technical_text for keyword in _TECHNICAL_KEYWORDS),
+    }
+
+
+def parse_profile(profile_text: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Parse LinkedIn profile text without an LLM.
+
+    Returns the same shape as ExtractorAgent.extract together with a
+    confidence score between 0 and 1 describing how much of the expected
+    layout was recognised.
+    """
+    sections: Dict[str, List[str]] = {}
+    for name, body in split_sections(profile_text):
+        sections.setdefault(name, []).append(body)
+
+    header_lines = split_lines("\n".join(sections.get("header", [])))
+    work_history = _parse_experience("\n".join(sections.get("experience", [])))
+    education = _parse_education("\n".join(sections.get("education", [])))
+    skills = _parse_skills("\n".join(sections.get("skills", [])))
+
+    headline = header_lines[1] if len(header_lines) > 1 else ""
+    role_text = " ".join([headline] + [w["role"] + " " + w["company"] for w in work_history])
+
+    keywords: List[str] = []
+    for word in re.findall(r"[A-Za-z][A-Za-z+#.\-]{2,}", headline):
+        if word.lower() not in ("and", "the", "for", "with", "at") and word not in keywords:
+            keywords.append(word)
+
+    profile = ProfileExtraction(
+        work_history=work_history,
+        education=education,
+        skills=skills,
+        industries=_find_industries(role_text + " " + " ".join(skills)),
+        keywords=keywords[:10],
+        tone_indicators=_infer_tone(role_text, skills, "\n".join(sections.get("about", [])), work_history),
+    ).model_dump()
+
+    confidence = 0.0
+    if header_lines and 1 <= len(header_lines[0].split()) <= 4:
+        confidence += _CONFIDENCE_WEIGHTS["header"]
+    if work_history:
+        confidence += _CONFIDENCE_WEIGHTS["experience"]
+    if education:
+        confidence += _CONFIDENCE_WEIGHTS["education"]
+    if skills:
+        confidence += _CONFIDENCE_WEIGHTS["skills"]
+
+    return profile, round(confidence, 2)
@@ -0,0 +1,156 @@
+"""Split, chunk, diff and merge LinkedIn profile text by page section."""
+import difflib
+from typing import Any, Dict, List, Tuple
+
+# Section headings as they appear on a LinkedIn profile page, mapped to a
+# canonical section name
+SECTION_HEADINGS = {
+    "about": "about",
+    "experience": "experience",
+    "education": "education",
+    "skills": "skills",
+    "licenses & certifications": "certifications",
+    "certifications": "certifications",
+    "projects": "projects",
+    "volunteering": "volunteering",
+    "volunteer experience": "volunteering",
+    "honors & awards": "honors",
+    "publications": "publications",
+    "courses": "courses",
+    "languages": "languages",
+    "recommendations": "recommendations",
+    "interests": "interests",
+    "activity": "activity",
+}
+
+HEADER_SECTION = "header"
+
+
+def split_lines(text: str) -> List[str]:
+    """Return non-empty stripped lines, dropping LinkedIn's duplicated lines."""
+    lines = []
+    for line in text.split("\n"):
+        line = line.strip()
+        # Copied LinkedIn pages repeat many lines (visible + screen-reader text)
+        if line and (not lines or lines[-1] != line):
+            lines.append(line)
+    return lines
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Split profile text into (section, body) pairs in document order.
+
+    Text before the first recognised heading is returned under "header".
+    Sections that appear more than once keep separate entries.
+    """
+    sections: List[Tuple[str, List[str]]] = [(HEADER_SECTION, [])]
+    for line in split_lines(text or ""):
+        heading = SECTION_HEADINGS.get(line.lower())
+        if heading:
+            sections.append((heading, []))
+        else:
+            sections[-1][1].append(line)
+
+    return [
+        (name, "\n".join(body))
+        for name, body in sections
+        if body or name != HEADER_SECTION
+    ]
+
+
+def change_ratio(old_text: str, new_text: str) -> float:
+    """Fraction of lines that differ between two versions of a profile, 0.0 to 1.0."""
+    old_lines = split_lines(old_text or "")
+    new_lines = split_lines(new_text or "")
+    if not old_lines and not new_lines:
+        return 0.0
+    return 1.0 - difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).ratio()
+
+
+def chunk_sections(text: str, max_chars: int) -> List[str]:
+    """
+    Group profile sections into chunks of at most roughly max_chars.
+
+    The header (name and headline) is repeated at the top of every chunk so
+    each chunk can be understood on its own. Sections longer than max_chars
+    are split on line boundaries.
+    """
+    sections = split_sections(text)
+    header = ""
+    if sections and sections[0][0] == HEADER_SECTION:
+        header = sections.pop(0)[1]
+
+    pieces: List[str] = []
+    for name, body in sections:
+        title = name.capitalize()
+        current: List[str] = []
+        for line in body.split("\n"):
+            if current and len("\n".join(current)) + len(line) > max_chars:
+                pieces.append(f"{title}\n" + "\n".join(current))
+                current = []
+            current.append(line)
+        pieces.append(f"{title}\n" + "\n".join(current))
+
+    chunks: List[str] = []
+    current_chunk = ""
+    for piece in pieces:
+        if current_chunk and len(current_chunk) + len(piece) > max_chars:
+            chunks.append(current_chunk)
+            current_chunk = ""
+        current_chunk = f"{current_chunk}\n{piece}" if current_chunk else piece
+
+    if current_chunk:
+        chunks.append(current_chunk)
+    if not chunks:
+        return [header] if header else []
+    return [f"{header}\n{chunk}" if header else chunk for chunk in chunks]
+
+
+def _merge_unique(values: List[str]) -> List[str]:
+    """Deduplicate strings case-insensitively, keeping first-seen order."""
+    seen = set()
+    merged = []
+    for value in values:
+        key = value.strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            merged.append(value.strip())
+    return merged
+
+
+def _merge_records(records: List[Dict[str, Any]], key_fields: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Deduplicate dict records on key_fields, keeping the longest value per field."""
+    merged: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    for record in records:
+        key = tuple(str(record.get(field, "")).strip().lower() for field in key_fields)
+        if key not in merged:
+            merged[key] = dict(record)
+            continue
+        existing = merged[key]
+        for field, value in record.items():
+            if len(str(value or "")) > len(str(existing.get(field) or "")):
+                existing[field] = value
+    return list(merged.values())
+
+
+def merge_profiles(profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge partial extractions (one per chunk) into a single profile."""
+    merged: Dict[str, Any] = {
+        "work_history": _merge_records(
+            [w for p in profiles for w in p.get("work_history", [])], ("company", "role")
+        ),
+        "education": _merge_records(
+            [e for p in profiles for e in p.get("education", [])], ("school", "degree")
+        ),
+    }
+    for field in ("skills", "industries", "achievements", "keywords"):
+        merged[field] = _merge_unique([v for p in profiles for v in p.get(field, [])])
+
+    tone: Dict[str, bool] = {}
+    for p in profiles:
+        for name, value in (p.get("tone_indicators") or {}).items():
+            tone[name] = tone.get(name, False) or bool(value)
+    merged["tone_indicators"] = tone
+
+    return merged
@@ -0,0 +1,246 @@
+"""Opt-in per-request sampling profiler with a per-stage timing breakdown."""
+import contextvars
+import functools
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid as uuid_lib
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+PROFILE_HEADER = "X-Profile-Request"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_NULL_STAGE = nullcontext()
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+# Profile of the request being served, None unless profiling was requested
+_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar("profile_session", default=None)
+
+
+def admin_token() -> str:
+    return os.getenv("ADMIN_TOKEN", "")
+
+
+def profiling_enabled() -> bool:
+    """Profiling needs ADMIN_TOKEN, both to request it by header and to read results."""
+    return bool(admin_token())
+
+
+def check_admin_token(token: Optional[str]) -> bool:
+    expected = admin_token()
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+
+def should_profile(header_value: Optional[str]) -> bool:
+    """Profile when the request carries the admin token in X-Profile-Request, or by sampling."""
+    if header_value:
+        return check_admin_token(header_value)
+    rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    return rate > 0 and random.random() < rate
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileSession:
+    """
+    Samples the stacks of threads working on one request.
+
+    A thread takes part while it is inside a stage() of the session, which
+    covers the endpoint's worker thread and any pool threads the request
+    fans out to. Stacks are kept in folded format ("a;b;c count"), which
+    flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, method: str, path: str, interval_seconds: float):
+        self.id = uuid_lib.uuid4().hex
+        self.method = method
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.started_at = datetime.now().isoformat()
+        self.status_code: Optional[int] = None
+        self.duration_ms = 0.0
+        self.active = True
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._threads: Dict[int, int] = {}
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.id[:8]}", daemon=True)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self.active = False
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self._stop.set()
+        self._sampler.join()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.active:
+            yield
+            return
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                depth = self._threads.get(thread_id, 1) - 1
+                if depth:
+                    self._threads[thread_id] = depth
+                else:
+                    self._threads.pop(thread_id, None)
+                stats = self._stages.setdefault(name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+                stats["calls"] += 1
+                stats["total_ms"] += elapsed_ms
+                stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def _sample(self) -> None:
+        sampler_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                thread_ids = [t for t in self._threads if t != sampler_id]
+            if not thread_ids:
+                continue
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if labels:
+                    self._stacks[";".join(reversed(labels))] += 1
+                    self._samples += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {
+                    "calls": stats["calls"],
+                    "total_ms": round(stats["total_ms"], 1),
+                    "max_ms": round(stats["max_ms"], 1)
+                }
+                for name, stats in sorted(self._stages.items(), key=lambda item: -item[1]["total_ms"])
+            }
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 1),
+            "interval_ms": round(self.interval_seconds * 1000, 1),
+            "samples": self._samples,
+            "stages": stages
+        }
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+def stage(name: str):
+    """Time a block as a named stage of the current profile; a shared no-op otherwise."""
+    session = _session.get()
+    if session is None:
+        return _NULL_STAGE
+    return session.stage(name)
+
+
+def profiled(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of stage() for whole functions."""
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            session = _session.get()
+            if session is None:
+                return fn(*args, **kwargs)
+            with session.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class ProfileStore:
+    """Keeps the most recent profiles as <id>.json summaries and <id>.folded stacks."""
+
+    def __init__(self, directory: Path, max_profiles: int = 50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def save(self, session: ProfileSession) -> None:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / f"{session.id}.json", "w") as f:
+                json.dump(session.summary(), f, indent=2)
+            with open(self.directory / f"{session.id}.folded", "w") as f:
+                f.write(session.folded())
+
+            summaries = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for old in summaries[:-self.max_profiles]:
+                old.unlink(missing_ok=True)
+                old.with_suffix(".folded").unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            with open(path) as f:
+                summary = json.load(f)
+            summary.pop("stages", None)
+            profiles.append(summary)
+        return sorted(profiles, key=lambda p: p["started_at"], reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self.directory / f"{profile_id}.json"
+        if not _PROFILE_ID.match(profile_id) or not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def folded(self, profile_id: str) -> Optional[str]:
+        path = self.directory / f"{profile_id}.folded"
+        if not _PROFILE_ID.match(profile_id) or not path.exists():
+            return None
+        return path.read_text()
+
+
+profile_store = ProfileStore(
+    Path(__file__).parent.parent / "data" / "profiles",
+    max_profiles=int(os.getenv("PROFILE_MAX_STORED", "50"))
+)
+
+
+@contextmanager
+def profile_request(method: str, path: str) -> Iterator[ProfileSession]:
+    """Profile everything run in this context; the profile is saved on exit."""
+    session = ProfileSession(method, path, float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000)
+    token = _session.set(session)
+    session.start()
+    try:
+        yield session
+    finally:
+        _session.reset(token)
+        session.stop()
+        try:
+            profile_store.save(session)
+        except OSError as e:
+            print(f"Saving profile {session.id} failed: {e}")
@@ -0,0 +1,33 @@
+"""Versioned prompt templates laid out for provider prefix caching."""
+from typing import Dict, List
+
+
+class PromptTemplate:
+    """
+    A prompt whose static part always comes before per-request data.
+
+    The system message holds the role description and all instructions, which
+    never change between calls, so the provider can cache that prefix. The user
+    message holds only the data for this request, ordered from most stable
+    (e.g. the caller's own profile) to least stable. Bump the version whenever
+    the static text changes so usage metrics can be compared per revision.
+    """
+
+    def __init__(self, name: str, version: int, system: str, instructions: str, data_template: str):
+        self.name = name
+        self.version = version
+        self.system = system.strip()
+        self.instructions = instructions.strip()
+        self.data_template = data_template.strip()
+
+    @property
+    def key(self) -> str:
+        """Identifier used when recording usage, e.g. "extractor@1"."""
+        return f"{self.name}@{self.version}"
+
+    def render(self, **data: str) -> List[Dict[str, str]]:
+        """Build the chat messages for one request."""
+        return [
+            {"role": "system", "content": f"{self.system}\n\n{self.instructions}"},
+            {"role": "user", "content": self.data_template.format(**data)}
+        ]
@@ -0,0 +1,229 @@
+"""Per-uuid token and request accounting, sliding-window quotas and load shedding."""
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+try:
+    from backend.logic.scheduler import INTERACTIVE, llm_scheduler
+except ImportError:
+    from logic.scheduler import INTERACTIVE, llm_scheduler
+
+
+class QuotaExceeded(Exception):
+    """A uuid used up its window; retry_after is when enough of it expires."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Overloaded(Exception):
+    """Too many LLM calls are queued to take on new work."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class _Window:
+    """Timestamped amounts over the last window_seconds, with a running sum."""
+
+    __slots__ = ("events", "total")
+
+    def __init__(self):
+        self.events: deque = deque()
+        self.total = 0
+
+    def add(self, now: float, amount: int) -> None:
+        self.events.append((now, amount))
+        self.total += amount
+
+    def prune(self, cutoff: float) -> None:
+        while self.events and self.events[0][0] <= cutoff:
+            self.total -= self.events.popleft()[1]
+
+    def seconds_until_below(self, limit: int, now: float, window_seconds: float) -> float:
+        """How long until the total drops below limit as old events expire."""
+        remaining = self.total
+        for at, amount in self.events:
+            remaining -= amount
+            if remaining < limit:
+                return at + window_seconds - now
+        return window_seconds
+
+
+def user_key(uuid: str) -> str:
+    """Stable, non-secret identifier for uuid in metrics."""
+    return hashlib.sha256(uuid.encode("utf-8")).hexdigest()[:16]
+
+
+class QuotaTracker:
+    """
+    Counts each uuid's LLM tokens and admitted requests over a sliding window.
+
+    admit() runs before a request makes any LLM call and raises QuotaExceeded
+    when either limit is used up (a limit of 0 disables it), or Overloaded
+    when the scheduler queue is deeper than shed_queue_depth. Interactive
+    requests are shed only at twice that depth. Counts are per process, and
+    a uuid idle for a whole window is forgotten, lifetime totals included.
+
+    One piece of work can span requests (a prefetch, then the generate that
+    uses it): credit() lets the later request through admit() once without
+    being counted, and refund() takes back a request that did no work.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float,
+        tokens_per_window: int,
+        requests_per_window: int,
+        shed_queue_depth: int,
+        shed_retry_after_seconds: float,
+        queue_depth: Callable[[], int]
+    ):
+        self.window_seconds = window_seconds
+        self.tokens_per_window = tokens_per_window
+        self.requests_per_window = requests_per_window
+        self.shed_queue_depth = shed_queue_depth
+        self.shed_retry_after_seconds = shed_retry_after_seconds
+        self._queue_depth = queue_depth
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, _Window] = {}
+        self._requests: Dict[str, _Window] = {}
+        self._lifetime: Dict[str, Dict[str, int]] = {}
+        self._credits: Dict[str, Dict[str, float]] = {}
+        self._rejected = {"quota": 0, "shed": 0}
+        self._next_sweep = time.monotonic() + window_seconds
+
+    def _sweep(self, now: float) -> None:
+        """Drop uuids with nothing left in either window, at most once per window. Caller holds the lock."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.window_seconds
+        cutoff = now - self.window_seconds
+        for uuid in list(self._lifetime):
+            tokens, requests = self._tokens.get(uuid), self._requests.get(uuid)
+            for window in (tokens, requests):
+                if window is not None:
+                    window.prune(cutoff)
+            if not (tokens and tokens.events) and not (requests and requests.events):
+                self._tokens.pop(uuid, None)
+                self._requests.pop(uuid, None)
+                del self._lifetime[uuid]
+        for uuid in list(self._credits):
+            credits = self._credits[uuid]
+            for key in [k for k, expires in credits.items() if expires <= now]:
+                del credits[key]
+            if not credits:
+                del self._credits[uuid]
+
+    def _windows(self, uuid: str, now: float):
+        cutoff = now - self.window_seconds
+        tokens = self._tokens.setdefault(uuid, _Window())
+        requests = self._requests.setdefault(uuid, _Window())
+        tokens.prune(cutoff)
+        requests.prune(cutoff)
+        return tokens, requests
+
+    def admit(self, uuid: str, priority: int, key: Optional[str] = None) -> bool:
+        """
+        Count a request for uuid, or raise QuotaExceeded / Overloaded without counting it.
+
+        A request whose key holds an unexpired credit uses the credit instead
+        and skips the quota check; load shedding still applies. Returns
+        whether the request was counted.
+        """
+        if self.shed_queue_depth:
+            threshold = self.shed_queue_depth * (2 if priority == INTERACTIVE else 1)
+            if self._queue_depth() > threshold:
+                with self._lock:
+                    self._rejected["shed"] += 1
+                raise Overloaded("Service is busy, please retry shortly", self.shed_retry_after_seconds)
+
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            if key is not None and self._credits.get(uuid, {}).pop(key, 0) > now:
+                return False
+            tokens, requests = self._windows(uuid, now)
+            retry_after = 0.0
+            if self.tokens_per_window and tokens.total >= self.tokens_per_window:
+                retry_after = tokens.seconds_until_below(self.tokens_per_window, now, self.window_seconds)
+            if self.requests_per_window and requests.total >= self.requests_per_window:
+                retry_after = max(retry_after, requests.seconds_until_below(self.requests_per_window, now, self.window_seconds))
+            if retry_after:
+                self._rejected["quota"] += 1
+                raise QuotaExceeded("Usage quota exceeded, please retry later", retry_after)
+            requests.add(now, 1)
+            self._lifetime.setdefault(uuid, {"requests": 0, "tokens": 0})["requests"] += 1
+            return True
+
+    def credit(self, uuid: str, key: str) -> None:
+        """Let the next admit() for key within the window through without counting it."""
+        with self._lock:
+            self._credits.setdefault(uuid, {})[key] = time.monotonic() + self.window_seconds
+
+    def refund(self, uuid: str) -> None:
+        """Take back uuid's most recently counted request."""
+        with self._lock:
+            requests = self._requests.get(uuid)
+            if requests and requests.events:
+                requests.total -= requests.events.pop()[1]
+                self._lifetime[uuid]["requests"] -= 1
+
+    def record_tokens(self, uuid: Optional[str], tokens: int) -> None:
+        """Charge tokens from a provider response's usage to uuid."""
+        if not uuid or not tokens:
+            return
+        now = time.monotonic()
+        with self._lock:
+            window, _ = self._windows(uuid, now)
+            window.add(now, tokens)
+            self._lifetime.setdefault(uuid, {"requests": 0, "tokens": 0})["tokens"] += tokens
+
+    def metrics(self, top: int = 10) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            users = {}
+            for uuid in list(self._lifetime):
+                tokens, requests = self._windows(uuid, now)
+                users[uuid] = {
+                    "window_tokens": tokens.total,
+                    "window_requests": requests.total,
+                    "total_tokens": self._lifetime[uuid]["tokens"],
+                    "total_requests": self._lifetime[uuid]["requests"]
+                }
+            rejected = dict(self._rejected)
+        # Metrics are unauthenticated and a uuid is a user's only credential, so users
+        # are keyed by a hash of the full uuid: distinct per user, but not usable to sign in
+        heaviest = [
+            (user_key(uuid), stats)
+            for uuid, stats in sorted(users.items(), key=lambda item: -item[1]["window_tokens"])[:top]
+        ]
+        return {
+            "window_seconds": self.window_seconds,
+            "tokens_per_window": self.tokens_per_window,
+            "requests_per_window": self.requests_per_window,
+            "shed_queue_depth": self.shed_queue_depth,
+            "queue_depth": self._queue_depth(),
+            "rejected": rejected,
+            "users": len(users),
+            "top_users": dict(heaviest)
+        }
+
+
+quota_tracker = QuotaTracker(
+    window_seconds=float(os.getenv("QUOTA_WINDOW_SECONDS", "3600")),
+    tokens_per_window=int(os.getenv("QUOTA_TOKENS_PER_WINDOW", "0")),
+    requests_per_window=int(os.getenv("QUOTA_REQUESTS_PER_WINDOW", "0")),
+    shed_queue_depth=int(os.getenv("LOAD_SHED_QUEUE_DEPTH", "200")),
+    shed_retry_after_seconds=float(os.getenv("LOAD_SHED_RETRY_AFTER_SECONDS", "5")),
+    queue_depth=llm_scheduler.queue_depth
+)
@@ -0,0 +1,240 @@
+"""Deadlines, retries, hedged requests and model fallback for LLM calls."""
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import openai
+try:
+    from backend.logic.scheduler import llm_scheduler
+except ImportError:
+    from logic.scheduler import llm_scheduler
+
+# Seconds each stage may take end to end, including retries and hedges
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "30"))
+STAGE_DEADLINES = {
+    "extractor": 20.0,
+    "overlap": 20.0,
+    "fused_analysis": 25.0,
+    "message_draft": 30.0,
+    "refinement": 15.0,
+    "followup": 20.0,
+}
+
+# Faster model to degrade to when the primary model can't finish in time
+FALLBACK_MODELS = {"gpt-4o": "gpt-4o-mini"}
+
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+HEDGING_ENABLED = os.getenv("LLM_HEDGING", "1").lower() in ("1", "true", "yes")
+# Most calls that may be hedged, as a percentage of all calls
+HEDGE_BUDGET_PERCENT = float(os.getenv("LLM_HEDGE_BUDGET_PERCENT", "5"))
+
+_RETRY_BASE_SECONDS = 0.5
+_RETRY_CAP_SECONDS = 8.0
+# Latency samples needed per (stage, model) before hedging or degrading on them
+_MIN_SAMPLES = 20
+_RETRYABLE_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+# One thread per call the scheduler can have in flight
+_hedge_pool = ThreadPoolExecutor(max_workers=llm_scheduler.max_limit, thread_name_prefix="llm-hedge")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage runs out of time before any attempt succeeds."""
+
+
+def stage_deadline(stage: str) -> float:
+    """Deadline for a stage, overridable with e.g. LLM_DEADLINE_MESSAGE_DRAFT=45."""
+    override = os.getenv(f"LLM_DEADLINE_{stage.upper()}")
+    if override:
+        return float(override)
+    return STAGE_DEADLINES.get(stage, DEFAULT_DEADLINE_SECONDS)
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, DeadlineExceeded)):
+        return True
+    return getattr(error, "status_code", None) in _RETRYABLE_STATUS
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per (stage, model)."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, model: str, latency: float) -> None:
+        with self._lock:
+            self._samples.setdefault((stage, model), deque(maxlen=self._window)).append(latency)
+
+    def percentile(self, stage: str, model: str, pct: float) -> Optional[float]:
+        """Return the pct-th percentile, or None until enough samples exist."""
+        with self._lock:
+            samples = sorted(self._samples.get((stage, model), ()))
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * pct / 100))
+        return samples[index]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            keys = list(self._samples)
+        summary = {}
+        for stage, model in keys:
+            p50 = self.percentile(stage, model, 50)
+            p95 = self.percentile(stage, model, 95)
+            if p50 is not None:
+                summary[f"{stage}:{model}"] = {"p50_ms": round(p50 * 1000, 1), "p95_ms": round(p95 * 1000, 1)}
+        return summary
+
+
+latency_tracker = LatencyTracker()
+
+_counters_lock = threading.Lock()
+_counters = {
+    "retries": 0, "hedges": 0, "hedge_wins": 0, "hedges_skipped": 0, "fallbacks": 0, "deadline_exceeded": 0
+}
+# Hedges currently affordable: each call adds HEDGE_BUDGET_PERCENT / 100, each hedge spends 1
+_hedge_tokens = 1.0
+_HEDGE_TOKENS_CAP = 10.0
+
+
+def _count(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def _earn_hedge_budget() -> None:
+    global _hedge_tokens
+    with _counters_lock:
+        _hedge_tokens = min(_HEDGE_TOKENS_CAP, _hedge_tokens + HEDGE_BUDGET_PERCENT / 100)
+
+
+def _spend_hedge_budget() -> bool:
+    """Take one hedge from the budget, unless calls are already queued for a slot."""
+    global _hedge_tokens
+    with _counters_lock:
+        # Under load a hedge would only wait in the same queue as the call it duplicates
+        if _hedge_tokens < 1 or llm_scheduler.queue_depth() > 0:
+            _counters["hedges_skipped"] += 1
+            return False
+        _hedge_tokens -= 1
+        _counters["hedges"] += 1
+        return True
+
+
+def get_resilience_metrics() -> Dict[str, Any]:
+    with _counters_lock:
+        counters = dict(_counters)
+    return {**counters, "latency": latency_tracker.summary()}
+
+
+class _Started:
+    """Set by an attempt once it holds a scheduler slot, so queue time is not counted as latency."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.at: Optional[float] = None
+
+    def __call__(self) -> None:
+        self.at = time.monotonic()
+        self.event.set()
+
+
+def _timed(stage: str, model: str, attempt: Callable[..., Any], deadline: float, started: _Started) -> Any:
+    result = attempt(model, deadline, started)
+    if started.at is not None:
+        latency_tracker.record(stage, model, time.monotonic() - started.at)
+    return result
+
+
+def _submit(fn: Callable[..., Any], *args: Any):
+    # Copy the caller's context so hedged calls keep their scheduling priority
+    return _hedge_pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _hedged(stage: str, model: str, attempt: Callable[..., Any], deadline: float) -> Any:
+    """Run one attempt, duplicating it if it is still running p95 latency after it got a slot."""
+    _earn_hedge_budget()
+    hedge_delay = latency_tracker.percentile(stage, model, 95) if HEDGING_ENABLED else None
+    if hedge_delay is None or time.monotonic() + hedge_delay >= deadline:
+        return _timed(stage, model, attempt, deadline, _Started())
+
+    started = _Started()
+    primary = _submit(_timed, stage, model, attempt, deadline, started)
+    # Wake up when the primary gets a slot, or finishes without one
+    primary.add_done_callback(lambda _: started.event.set())
+    started.event.wait(timeout=max(0.0, deadline - time.monotonic()))
+    if not primary.done() and started.at is not None:
+        wait([primary], timeout=max(0.0, min(started.at + hedge_delay, deadline) - time.monotonic()))
+    if primary.done():
+        return primary.result()
+
+    pending = {primary}
+    hedge = None
+    if started.at is not None and time.monotonic() < deadline and _spend_hedge_budget():
+        hedge = _submit(_timed, stage, model, attempt, deadline, _Started())
+        pending.add(hedge)
+    error: Optional[Exception] = None
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    _count("hedge_wins")
+                return future.result()
+            error = future.exception()
+
+    if error is not None and not pending:
+        raise error
+    raise DeadlineExceeded(f"{stage} did not finish within its deadline")
+
+
+def call_with_resilience(stage: str, model: str, attempt: Callable[..., Any]) -> Any:
+    """
+    Call attempt(model, deadline, started) within the stage deadline.
+
+    attempt must call started() once it holds a scheduler slot and size its
+    request timeout from the time left then, raising DeadlineExceeded if
+    none is. Retryable errors are retried with jittered exponential backoff,
+    attempts still running p95 latency after getting a slot are hedged within
+    the hedge budget, and the stage degrades to a faster fallback model when
+    the primary model's median latency no longer fits in the time left.
+    """
+    deadline = time.monotonic() + stage_deadline(stage)
+    retries = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _count("deadline_exceeded")
+            raise DeadlineExceeded(f"{stage} did not finish within its deadline")
+
+        attempt_model = model
+        fallback = FALLBACK_MODELS.get(model)
+        typical = latency_tracker.percentile(stage, model, 50)
+        if fallback and typical is not None and typical > remaining:
+            attempt_model = fallback
+            _count("fallbacks")
+
+        try:
+            return _hedged(stage, attempt_model, attempt, deadline)
+        except Exception as e:
+            if not _is_retryable(e) or retries >= MAX_RETRIES:
+                if isinstance(e, DeadlineExceeded):
+                    _count("deadline_exceeded")
+                raise
+            backoff = min(_RETRY_CAP_SECONDS, _RETRY_BASE_SECONDS * 2 ** retries) * random.uniform(0.5, 1.0)
+            if time.monotonic() + backoff >= deadline:
+                _count("deadline_exceeded")
+                raise
+            retries += 1
+            _count("retries")
+            time.sleep(backoff)
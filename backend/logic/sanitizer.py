@@ -1,8 +1,66 @@
 """Input sanitization utilities."""
 import re
 import html
+try:
+    from backend.logic.profiling import profiled
+except ImportError:
+    from logic.profiling import profiled
 
 
+# Rule set, applied in this order. Each group is compiled once into a single
+# alternation and only runs when its cheap trigger finds something to do, so
+# plain text costs a few substring checks. Script and style blocks come before
+# the generic tag rule so their content is removed along with the tags.
+MARKUP_RULES = [
+    r'<script\b[^>]*>.*?</script\s*>',
+    r'<style\b[^>]*>.*?</style\s*>',
+    r'<[^>]+>',
+]
+INJECTION_RULES = [
+    r'ignore\s+previous\s+instructions',
+    r'system\s*:',
+    r'you\s+are\s+now',
+    r'forget\s+everything',
+    r'new\s+instructions',
+]
+# First word of each injection rule; the rules can't match without one
+_INJECTION_KEYWORDS = ("ignore", "system", "you", "forget", "new")
+
+_MARKUP = re.compile("|".join(MARKUP_RULES), re.IGNORECASE | re.DOTALL)
+# Matched against lowercased text: case-sensitive patterns let the regex
+# engine skip ahead on literal prefixes, which IGNORECASE prevents
+_INJECTION = re.compile("|".join(INJECTION_RULES))
+_INJECTION_IGNORECASE = re.compile("|".join(INJECTION_RULES), re.IGNORECASE)
+# Whitespace that isn't already a single space or newline
+_WHITESPACE = re.compile(r'\s{2,}|[^\S\n ]')
+_ODD_WHITESPACE = re.compile(r'[^\S\n ]')
+
+
+def _collapse_whitespace(match: re.Match) -> str:
+    # Keep a line break if the run had one, so pasted profile layouts survive
+    return "\n" if "\n" in match.group() else " "
+
+
+def _remove_injections(text: str) -> str:
+    lowered = text.lower()
+    if not any(keyword in lowered for keyword in _INJECTION_KEYWORDS):
+        return text
+    if len(lowered) != len(text):
+        # A few characters change length when lowercased; offsets wouldn't line up
+        return _INJECTION_IGNORECASE.sub('', text)
+    
+    pieces = []
+    position = 0
+    for match in _INJECTION.finditer(lowered):
+        pieces.append(text[position:match.start()])
+        position = match.end()
+    if not pieces:
+        return text
+    pieces.append(text[position:])
+    return "".join(pieces)
+
+
+@profiled("sanitize")
 def sanitize_input(text: str, max_length: int = 8000) -> str:
     """
     Sanitize user input by:
@@ -15,32 +73,22 @@ def sanitize_input(text: str, max_length: int = 8000) -> str:
         return ""
     
     # Decode HTML entities
-    text = html.unescape(text)
-    
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
+    if "&" in text:
+        text = html.unescape(text)
     
-    # Remove script tags and content
-    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    # Remove script and style blocks, then any remaining tags
+    if "<" in text:
+        text = _MARKUP.sub('', text)
     
     # Remove common injection attempts
-    injection_patterns = [
-        r'ignore\s+previous\s+instructions',
-        r'system\s*:',
-        r'you\s+are\s+now',
-        r'forget\s+everything',
-        r'new\s+instructions',
-    ]
-    for pattern in injection_patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    text = _remove_injections(text)
     
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
+    # Collapse whitespace runs to a single space or line break
+    if "  " in text or "\n\n" in text or " \n" in text or "\n " in text or _ODD_WHITESPACE.search(text):
+        text = _WHITESPACE.sub(_collapse_whitespace, text)
     
     # Trim and enforce max length
-    text = text.strip()[:max_length]
-    
-    return text
+    return text.strip()[:max_length]
 
 
 def enforce_character_limit(text: str, max_chars: int) -> str:
@@ -0,0 +1,216 @@
+"""Shared adaptive concurrency limiter and priority scheduler for LLM calls."""
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+try:
+    from backend.logic.profiling import stage
+except ImportError:
+    from logic.profiling import stage
+
+# Priority classes, lower runs first
+INTERACTIVE = 0  # A user is waiting on a small call (refine, follow-up)
+BULK = 1         # Generation, profile extraction, prefetch
+BACKGROUND = 2   # Speculative work such as follow-up pre-generation
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk", BACKGROUND: "background"}
+
+_ANONYMOUS = "anonymous"
+
+# (uuid, priority) of the request on whose behalf LLM calls are made
+_request_context: contextvars.ContextVar[Tuple[Optional[str], int]] = contextvars.ContextVar(
+    "llm_request_context", default=(None, BULK)
+)
+
+
+@contextmanager
+def llm_priority(priority: int, uuid: Optional[str] = None) -> Iterator[None]:
+    """Run LLM calls made inside the block with this priority and owner."""
+    token = _request_context.set((uuid, priority))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def current_request_context() -> Tuple[Optional[str], int]:
+    """Return the (uuid, priority) that applies to calls made right now."""
+    return _request_context.get()
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+class _Ticket:
+    __slots__ = ("priority", "uuid", "enqueued_at", "granted")
+
+    def __init__(self, priority: int, uuid: str):
+        self.priority = priority
+        self.uuid = uuid
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+
+
+class AdaptiveScheduler:
+    """
+    Limits concurrent provider calls with an AIMD-adjusted limit.
+
+    Each success below the latency target raises the limit by 1/limit (about
+    +1 per round of calls); a 429 halves it and a slow call trims it by 10%.
+    Waiting calls are served strictly by priority class and round-robin across
+    uuids within a class, so one user's burst cannot starve everyone else.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_target_seconds: float = 20.0
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_seconds = latency_target_seconds
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._queues: Dict[int, "OrderedDict[str, deque]"] = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._queue_stats = {
+            p: {"calls": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0} for p in PRIORITY_NAMES
+        }
+        self._rate_limited = 0
+        self._slow_calls = 0
+
+    def run(
+        self,
+        fn: Callable[[], Any],
+        priority: Optional[int] = None,
+        uuid: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Any:
+        """
+        Wait for a slot, then call fn(); priority and uuid default to the request context.
+
+        Raises TimeoutError if no slot is free by deadline (a time.monotonic() value).
+        """
+        context_uuid, context_priority = current_request_context()
+        ticket = _Ticket(
+            context_priority if priority is None else priority,
+            uuid or context_uuid or _ANONYMOUS
+        )
+        with stage("llm_queue_wait"):
+            self._acquire(ticket, deadline)
+
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            self._release(time.perf_counter() - start, rate_limited=_is_rate_limited(e))
+            raise
+        self._release(time.perf_counter() - start, rate_limited=False)
+        return result
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return self._queued()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": round(self._limit, 2),
+                "in_flight": self._in_flight,
+                "queued": self._queued(),
+                "rate_limited": self._rate_limited,
+                "slow_calls": self._slow_calls,
+                "queue_wait": {
+                    PRIORITY_NAMES[p]: {
+                        "calls": stats["calls"],
+                        "avg_wait_ms": round(stats["total_wait_ms"] / stats["calls"], 1) if stats["calls"] else 0.0,
+                        "max_wait_ms": round(stats["max_wait_ms"], 1),
+                        "queued": sum(len(q) for q in self._queues[p].values())
+                    }
+                    for p, stats in self._queue_stats.items()
+                }
+            }
+
+    def _queued(self) -> int:
+        return sum(len(q) for users in self._queues.values() for q in users.values())
+
+    def _acquire(self, ticket: _Ticket, deadline: Optional[float]) -> None:
+        with self._cond:
+            self._queues[ticket.priority].setdefault(ticket.uuid, deque()).append(ticket)
+            self._dispatch()
+            while not ticket.granted:
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._withdraw(ticket)
+                    raise TimeoutError("No LLM slot became free before the deadline")
+                self._cond.wait(remaining)
+
+            wait_ms = (time.perf_counter() - ticket.enqueued_at) * 1000
+            stats = self._queue_stats[ticket.priority]
+            stats["calls"] += 1
+            stats["total_wait_ms"] += wait_ms
+            stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+
+    def _withdraw(self, ticket: _Ticket) -> None:
+        """Take a waiting ticket out of its queue. Caller holds the lock."""
+        users = self._queues[ticket.priority]
+        queue = users[ticket.uuid]
+        queue.remove(ticket)
+        if not queue:
+            del users[ticket.uuid]
+
+    def _release(self, latency: float, rate_limited: bool) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if rate_limited:
+                self._rate_limited += 1
+                self._limit = max(self.min_limit, self._limit / 2)
+            elif latency > self.latency_target_seconds:
+                self._slow_calls += 1
+                self._limit = max(self.min_limit, self._limit * 0.9)
+            else:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant waiting tickets while below the limit. Caller holds the lock."""
+        granted = False
+        while self._in_flight < max(self.min_limit, int(self._limit)):
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            ticket.granted = True
+            self._in_flight += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            if not users:
+                continue
+            uuid, queue = next(iter(users.items()))
+            ticket = queue.popleft()
+            # Move this uuid to the back so the next slot goes to someone else
+            del users[uuid]
+            if queue:
+                users[uuid] = queue
+            return ticket
+        return None
+
+
+llm_scheduler = AdaptiveScheduler(
+    initial_limit=int(os.getenv("LLM_INITIAL_CONCURRENCY", "8")),
+    max_limit=int(os.getenv("LLM_MAX_CONCURRENCY", "64")),
+    latency_target_seconds=float(os.getenv("LLM_LATENCY_TARGET_SECONDS", "20"))
+)
@@ -0,0 +1,56 @@
+"""Pydantic models describing the JSON shapes returned by the agents."""
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class WorkHistoryItem(BaseModel):
+    company: str = ""
+    role: str = ""
+    duration: str = ""
+    responsibilities: str = ""
+
+
+class EducationItem(BaseModel):
+    school: str = ""
+    degree: str = ""
+    field: str = ""
+
+
+class ToneIndicators(BaseModel):
+    professional: bool = False
+    casual: bool = False
+    technical: bool = False
+
+
+class ProfileExtraction(BaseModel):
+    """Structured profile produced by ExtractorAgent."""
+    work_history: List[WorkHistoryItem] = Field(default_factory=list)
+    education: List[EducationItem] = Field(default_factory=list)
+    skills: List[str] = Field(default_factory=list)
+    industries: List[str] = Field(default_factory=list)
+    achievements: List[str] = Field(default_factory=list)
+    keywords: List[str] = Field(default_factory=list)
+    tone_indicators: ToneIndicators = Field(default_factory=ToneIndicators)
+
+
+class OverlapSummary(BaseModel):
+    """Overlap analysis produced by OverlapAgent."""
+    shared_companies: List[str] = Field(default_factory=list)
+    shared_schools: List[str] = Field(default_factory=list)
+    shared_industries: List[str] = Field(default_factory=list)
+    skill_overlap: List[str] = Field(default_factory=list)
+    alignment: str = ""
+    personalization_hook_options: List[str] = Field(default_factory=list)
+
+
+class FusedAnalysis(BaseModel):
+    """Combined extraction and overlap produced by FusedAnalysisAgent."""
+    target_profile: ProfileExtraction
+    overlap_summary: OverlapSummary
+
+
+class DraftMessages(BaseModel):
+    """The three outreach messages produced by MessageDraftAgent."""
+    linkedin_connection_request: str = Field(min_length=1)
+    cold_outreach_email: str = Field(min_length=1)
+    followup_template: str = Field(min_length=1)
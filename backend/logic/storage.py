@@ -1,123 +1,644 @@
 """JSON-based persistent storage utilities."""
+import hashlib
+import heapq
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 import uuid as uuid_lib
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    from backend.logic.analytics import apply_entry, empty_aggregates, entry_dimensions
+    from backend.logic.cache import get_cache
+    from backend.logic.history_archive import (
+        ARCHIVE_DIR, load_index, open_segment, read_segment, save_index, segment_record, write_segment
+    )
+    from backend.logic.near_duplicates import FingerprintIndex
+    from backend.logic.profiling import profiled
+except ImportError:
+    from logic.analytics import apply_entry, empty_aggregates, entry_dimensions
+    from logic.cache import get_cache
+    from logic.history_archive import (
+        ARCHIVE_DIR, load_index, open_segment, read_segment, save_index, segment_record, write_segment
+    )
+    from logic.near_duplicates import FingerprintIndex
+    from logic.profiling import profiled
 
+# History tiers: history.json holds recent entries and drafts still being worked
+# on; compaction moves the rest into compressed archive segments
+HISTORY_HOT_DAYS = int(os.getenv("HISTORY_HOT_DAYS", "30"))
+HISTORY_DRAFT_HOT_DAYS = int(os.getenv("HISTORY_DRAFT_HOT_DAYS", "90"))
+HISTORY_HOT_MAX_ENTRIES = int(os.getenv("HISTORY_HOT_MAX_ENTRIES", "200"))
+HISTORY_SEGMENT_ENTRIES = 500
 
-def get_user_dir(uuid: str) -> Path:
-    """Get the user data directory for a given UUID."""
+# Parsed profiles and embeddings, keyed by profile version so a save in any
+# worker makes older entries unreachable
+_profile_cache = get_cache().namespace("profile", float(os.getenv("CACHE_PROFILE_TTL_SECONDS", "86400")))
+
+# MinHash fingerprints of target profiles, for spotting repeat targets
+_fingerprints = FingerprintIndex()
+
+# Per-user locks so concurrent writers (requests, background workers) don't
+# lose each other's read-modify-write updates. A fixed set of stripes keeps
+# memory flat however many uuids are seen; users sharing a stripe only
+# serialize with each other.
+_LOCK_STRIPES = 64
+_user_locks = [threading.RLock() for _ in range(_LOCK_STRIPES)]
+
+# Open lock files held by this thread: {uuid: (file, depth)}
+_held_file_locks = threading.local()
+
+
+@contextmanager
+def _user_lock(uuid: str) -> Iterator[None]:
+    """
+    Hold uuid's storage lock, across threads and worker processes.
+
+    The stripe lock orders threads in this process; an flock on the user's
+    .lock file orders processes, so compaction in one worker can't race a
+    write in another. Reentrant within a thread. Without fcntl (Windows)
+    only threads are ordered, so run a single worker there.
+    """
+    stripe = int.from_bytes(hashlib.blake2b(uuid.encode("utf-8"), digest_size=4).digest(), "little")
+    with _user_locks[stripe % _LOCK_STRIPES]:
+        if fcntl is None:
+            yield
+            return
+        
+        held = _held_file_locks.__dict__.setdefault("files", {})
+        if uuid in held:
+            lock_file, depth = held[uuid]
+            held[uuid] = (lock_file, depth + 1)
+        else:
+            lock_file = open(get_user_dir(uuid) / ".lock", "a")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            held[uuid] = (lock_file, 1)
+        try:
+            yield
+        finally:
+            lock_file, depth = held[uuid]
+            if depth > 1:
+                held[uuid] = (lock_file, depth - 1)
+            else:
+                del held[uuid]
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+
+def _users_root() -> Path:
     # Try to find the backend directory
     current_file = Path(__file__)
     # If we're in backend/logic/, go up two levels
     if current_file.parts[-2] == "logic":
-        base_dir = current_file.parent.parent / "data" / "users" / uuid
-    else:
-        # Fallback: use current directory
-        base_dir = Path("backend/data/users") / uuid
+        return current_file.parent.parent / "data" / "users"
+    # Fallback: use current directory
+    return Path("backend/data/users")
+
+
+def get_user_dir(uuid: str) -> Path:
+    """Get the user data directory for a given UUID."""
+    base_dir = _users_root() / uuid
     base_dir.mkdir(parents=True, exist_ok=True)
     return base_dir
 
 
-def save_user_profile(uuid: str, profile_data: Dict[str, Any], embedding: list) -> None:
-    """Save user profile and embedding."""
+def list_user_ids() -> List[str]:
+    """Return the UUIDs of all users with stored data."""
+    root = _users_root()
+    if not root.exists():
+        return []
+    return [path.name for path in root.iterdir() if path.is_dir()]
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    """Write to a temp file and swap it in so readers never see a partial file."""
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        f.write(content)
+    os.replace(tmp_file, path)
+
+
+def _read_versions(user_dir: Path) -> Dict[str, Any]:
+    versions = {"version": 0, "history_version": 0, "profile_version": 0, "history_modified": 0.0, "profile_modified": 0.0}
+    version_file = user_dir / "version.json"
+    if version_file.exists():
+        with open(version_file, 'r') as f:
+            versions.update(json.load(f))
+    return versions
+
+
+def _next_version(user_dir: Path) -> int:
+    """The version the next change will be recorded under. Caller holds the user lock."""
+    return _read_versions(user_dir)["version"] + 1
+
+
+def _bump_version(user_dir: Path, resource: str) -> int:
+    """
+    Advance the user's version counter for a change to resource ("history" or "profile").
+
+    Call once the change is on disk: other workers key cached reads and
+    ETags on the version, so it must never be ahead of the files. Caller
+    holds the user lock.
+    """
+    versions = _read_versions(user_dir)
+    versions["version"] += 1
+    versions[f"{resource}_version"] = versions["version"]
+    versions[f"{resource}_modified"] = time.time()
+    _write_atomic(user_dir / "version.json", json.dumps(versions))
+    return versions["version"]
+
+
+def get_versions(uuid: str) -> Dict[str, Any]:
+    """
+    Return the user's version counters and modification times.
+
+    Every change bumps "version"; "history_version" and "profile_version"
+    hold the version of the latest change to each, for ETags and delta sync.
+    """
+    with _user_lock(uuid):
+        return _read_versions(get_user_dir(uuid))
+
+
+@profiled("storage:save_user_profile")
+def save_user_profile(
+    uuid: str,
+    profile_data: Dict[str, Any],
+    embedding: list,
+    profile_text: Optional[str] = None,
+    chunks: Optional[List[Dict[str, Any]]] = None
+) -> None:
+    """Save user profile and embedding, plus the source text and per-chunk extractions when given."""
     user_dir = get_user_dir(uuid)
     
     profile_file = user_dir / "my_profile.json"
     embedding_file = user_dir / "my_profile_embedding.json"
     
-    with open(profile_file, 'w') as f:
-        json.dump(profile_data, f, indent=2)
-    
-    with open(embedding_file, 'w') as f:
-        json.dump(embedding, f, indent=2)
+    with _user_lock(uuid):
+        _write_atomic(profile_file, json.dumps(profile_data, indent=2))
+        _write_atomic(embedding_file, json.dumps(embedding, indent=2))
+        
+        if profile_text is not None:
+            _write_atomic(user_dir / "my_profile_text.txt", profile_text)
+        
+        if chunks is not None:
+            _write_atomic(user_dir / "my_profile_sections.json", json.dumps(chunks, separators=(",", ":")))
+        
+        _bump_version(user_dir, "profile")
 
 
-def load_user_profile(uuid: str) -> Optional[Dict[str, Any]]:
-    """Load user profile."""
+@profiled("storage:load_user_profile_source")
+def load_user_profile_source(uuid: str) -> Tuple[Optional[str], Optional[List[Dict[str, Any]]]]:
+    """Load the text the profile was last extracted from and its per-chunk extractions."""
     user_dir = get_user_dir(uuid)
-    profile_file = user_dir / "my_profile.json"
+    text_file = user_dir / "my_profile_text.txt"
+    sections_file = user_dir / "my_profile_sections.json"
     
-    if not profile_file.exists():
-        return None
+    with _user_lock(uuid):
+        profile_text = text_file.read_text() if text_file.exists() else None
+        chunks = None
+        if sections_file.exists():
+            with open(sections_file, 'r') as f:
+                chunks = json.load(f)
     
-    with open(profile_file, 'r') as f:
-        return json.load(f)
+    return profile_text, chunks
 
 
-def load_user_embedding(uuid: str) -> Optional[list]:
-    """Load user profile embedding."""
+def _load_profile_file(uuid: str, file_name: str) -> Optional[Any]:
+    """Read one of the user's profile files through the shared cache."""
     user_dir = get_user_dir(uuid)
-    embedding_file = user_dir / "my_profile_embedding.json"
     
-    if not embedding_file.exists():
-        return None
+    with _user_lock(uuid):
+        version = _read_versions(user_dir)["profile_version"]
+        key = f"{uuid}:{version}:{file_name}"
+        cached = _profile_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        path = user_dir / file_name
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            data = json.load(f)
     
-    with open(embedding_file, 'r') as f:
+    _profile_cache.set(key, data)
+    return data
+
+
+@profiled("storage:load_user_profile")
+def load_user_profile(uuid: str) -> Optional[Dict[str, Any]]:
+    """Load user profile."""
+    return _load_profile_file(uuid, "my_profile.json")
+
+
+@profiled("storage:load_user_embedding")
+def load_user_embedding(uuid: str) -> Optional[list]:
+    """Load user profile embedding."""
+    return _load_profile_file(uuid, "my_profile_embedding.json")
+
+
+def _read_hot(history_file: Path) -> list:
+    if not history_file.exists():
+        return []
+    with open(history_file, 'r') as f:
         return json.load(f)
 
 
+def _write_hot(history_file: Path, history: list) -> None:
+    _write_atomic(history_file, json.dumps(history, separators=(",", ":")))
+
+
+def _segment_base_name(file_name: str) -> str:
+    return file_name.split(".jsonl")[0]
+
+
+def _sort_key(entry: Dict[str, Any]) -> Tuple[str, str]:
+    return (entry.get('timestamp') or '', entry.get('id') or '')
+
+
+def _timestamp(entry: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(entry.get('timestamp', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+@profiled("storage:save_history_entry")
 def save_history_entry(uuid: str, entry: Dict[str, Any]) -> str:
     """Save a history entry and return its ID."""
     user_dir = get_user_dir(uuid)
     history_file = user_dir / "history.json"
     
-    # Load existing history
-    if history_file.exists():
-        with open(history_file, 'r') as f:
-            history = json.load(f)
-    else:
-        history = []
-    
-    # Generate entry ID
-    entry_id = str(uuid_lib.uuid4())
-    entry['id'] = entry_id
-    
-    # Add timestamp if not present
-    if 'timestamp' not in entry:
-        from datetime import datetime
-        entry['timestamp'] = datetime.now().isoformat()
-    
-    history.append(entry)
-    
-    # Save back
-    with open(history_file, 'w') as f:
-        json.dump(history, f, indent=2)
+    with _user_lock(uuid):
+        # New entries only touch the hot tier
+        history = _read_hot(history_file)
+        
+        # Generate entry ID
+        entry_id = str(uuid_lib.uuid4())
+        entry['id'] = entry_id
+        
+        # Add timestamp if not present
+        if 'timestamp' not in entry:
+            entry['timestamp'] = datetime.now().isoformat()
+        entry['version'] = _next_version(user_dir)
+        
+        history.append(entry)
+        
+        # Save back
+        _write_hot(history_file, history)
+        _bump_version(user_dir, "history")
+        _index_fingerprints(uuid, [entry])
+        _record_analytics(user_dir, [], [entry])
     
     return entry_id
 
 
+@profiled("storage:load_history")
 def load_history(uuid: str) -> list:
-    """Load user history."""
+    """Load user history, including archived entries, oldest first."""
     user_dir = get_user_dir(uuid)
     history_file = user_dir / "history.json"
     
-    if not history_file.exists():
-        return []
+    with _user_lock(uuid):
+        history = _read_hot(history_file)
+        segments = load_index(user_dir)
+        if not segments:
+            return history
+        
+        # An interrupted compaction can leave an entry in both tiers; the hot copy wins
+        entries: Dict[str, Dict[str, Any]] = {}
+        for segment in segments:
+            for entry in read_segment(user_dir / ARCHIVE_DIR / segment["file"]):
+                entries[entry.get('id')] = entry
+        for entry in history:
+            entries[entry.get('id')] = entry
     
-    with open(history_file, 'r') as f:
-        return json.load(f)
+    return sorted(entries.values(), key=lambda e: e.get('timestamp', ''))
+
+
+@profiled("storage:load_history_entry")
+def load_history_entry(uuid: str, entry_id: str) -> Optional[Dict[str, Any]]:
+    """Load a single history entry, reading at most one archive segment."""
+    user_dir = get_user_dir(uuid)
+    history_file = user_dir / "history.json"
+    
+    with _user_lock(uuid):
+        for entry in _read_hot(history_file):
+            if entry.get('id') == entry_id:
+                return entry
+        
+        for segment in reversed(load_index(user_dir)):
+            if entry_id in segment["ids"]:
+                for entry in read_segment(user_dir / ARCHIVE_DIR / segment["file"]):
+                    if entry.get('id') == entry_id:
+                        return entry
+    
+    return None
 
 
+@profiled("storage:update_history_entry")
 def update_history_entry(uuid: str, entry_id: str, updates: Dict[str, Any]) -> bool:
     """Update a specific history entry."""
     user_dir = get_user_dir(uuid)
     history_file = user_dir / "history.json"
     
-    if not history_file.exists():
-        return False
-    
-    with open(history_file, 'r') as f:
-        history = json.load(f)
-    
-    # Find and update entry
-    for entry in history:
-        if entry.get('id') == entry_id:
-            entry.update(updates)
-            with open(history_file, 'w') as f:
-                json.dump(history, f, indent=2)
+    with _user_lock(uuid):
+        history = _read_hot(history_file)
+        
+        # Find and update entry
+        for entry in history:
+            if entry.get('id') == entry_id:
+                before = dict(entry)
+                entry.update(updates)
+                entry['version'] = _next_version(user_dir)
+                _write_hot(history_file, history)
+                _bump_version(user_dir, "history")
+                _record_analytics(user_dir, [before], [entry])
+                return True
+        
+        # Archived entries are updated by rewriting their segment
+        segments = load_index(user_dir)
+        for segment in reversed(segments):
+            if entry_id not in segment["ids"]:
+                continue
+            archive_dir = user_dir / ARCHIVE_DIR
+            entries = list(read_segment(archive_dir / segment["file"]))
+            version = _next_version(user_dir)
+            for entry in entries:
+                if entry.get('id') == entry_id:
+                    before = dict(entry)
+                    entry.update(updates)
+                    entry['version'] = version
+                    _record_analytics(user_dir, [before], [entry])
+            segment["max_version"] = version
+            old_file = segment["file"]
+            segment["file"] = write_segment(archive_dir, _segment_base_name(old_file), entries)
+            save_index(user_dir, segments)
+            _bump_version(user_dir, "history")
+            if segment["file"] != old_file:
+                (archive_dir / old_file).unlink(missing_ok=True)
             return True
     
     return False
 
+
+@profiled("storage:compact_history")
+def compact_history(uuid: str, now: Optional[datetime] = None) -> int:
+    """
+    Move entries out of the hot tier into compressed archive segments.
+
+    Entries stay hot while they are younger than HISTORY_HOT_DAYS, or drafts
+    younger than HISTORY_DRAFT_HOT_DAYS; beyond HISTORY_HOT_MAX_ENTRIES the
+    oldest are archived regardless. Segments are written and indexed before
+    the hot file is rewritten, so a crash never loses entries. Returns the
+    number of entries archived.
+    """
+    user_dir = get_user_dir(uuid)
+    history_file = user_dir / "history.json"
+    now = now or datetime.now()
+    
+    with _user_lock(uuid):
+        history = _read_hot(history_file)
+        
+        def stays_hot(entry: Dict[str, Any]) -> bool:
+            timestamp = _timestamp(entry)
+            if timestamp is None:
+                return True
+            age = now - timestamp
+            if entry.get('status', 'draft') == 'draft':
+                return age <= timedelta(days=HISTORY_DRAFT_HOT_DAYS)
+            return age <= timedelta(days=HISTORY_HOT_DAYS)
+        
+        hot = [e for e in history if stays_hot(e)]
+        if len(hot) > HISTORY_HOT_MAX_ENTRIES:
+            overflow = sorted(hot, key=lambda e: e.get('timestamp', ''))[:len(hot) - HISTORY_HOT_MAX_ENTRIES]
+            overflow_ids = {id(e) for e in overflow}
+            hot = [e for e in hot if id(e) not in overflow_ids]
+        hot_ids = {id(e) for e in hot}
+        archived = sorted((e for e in history if id(e) not in hot_ids), key=lambda e: e.get('timestamp', ''))
+        if not archived:
+            return 0
+        
+        archive_dir = user_dir / ARCHIVE_DIR
+        segments = load_index(user_dir)
+        replaced_files = []
+        pending = archived
+        # Top up the newest segment before starting another
+        if segments and segments[-1]["count"] < HISTORY_SEGMENT_ENTRIES:
+            last = segments.pop()
+            replaced_files.append(last["file"])
+            pending = list(read_segment(archive_dir / last["file"])) + archived
+        
+        # Segments are kept in timestamp order so exports can merge them as streams
+        pending.sort(key=_sort_key)
+        for start in range(0, len(pending), HISTORY_SEGMENT_ENTRIES):
+            batch = pending[start:start + HISTORY_SEGMENT_ENTRIES]
+            file_name = write_segment(archive_dir, f"segment-{len(segments) + 1:06d}", batch)
+            segments.append(segment_record(file_name, batch))
+        save_index(user_dir, segments)
+        
+        current_files = {segment["file"] for segment in segments}
+        for file_name in replaced_files:
+            if file_name not in current_files:
+                (archive_dir / file_name).unlink(missing_ok=True)
+        
+        _write_hot(history_file, hot)
+    
+    return len(archived)
+
+
+def iter_history(uuid: str, after: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield a user's history in (timestamp, id) order, one entry at a time.
+
+    Archive segments are merged as streams, so memory stays bounded by the
+    hot tier however long the history is. after resumes an earlier iteration
+    following the entry with that ID; KeyError if it doesn't exist.
+    """
+    user_dir = get_user_dir(uuid)
+    history_file = user_dir / "history.json"
+    
+    # Segments are opened under the lock: compaction replaces files rather
+    # than rewriting them, so the open handles stay a consistent snapshot
+    archive_dir = user_dir / ARCHIVE_DIR
+    with _user_lock(uuid):
+        hot = sorted(_read_hot(history_file), key=_sort_key)
+        segments = [open_segment(archive_dir / segment["file"]) for segment in load_index(user_dir)]
+    
+    start_key = None
+    if after:
+        cursor_entry = load_history_entry(uuid, after)
+        if cursor_entry is None:
+            raise KeyError(after)
+        start_key = _sort_key(cursor_entry)
+    
+    hot_ids = {entry.get('id') for entry in hot}
+    streams = [
+        (entry for entry in segment if entry.get('id') not in hot_ids)
+        for segment in segments
+    ]
+    for entry in heapq.merge(*streams, hot, key=_sort_key):
+        if start_key is None or _sort_key(entry) > start_key:
+            yield entry
+
+
+@profiled("storage:import_history_entries")
+def import_history_entries(uuid: str, entries: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Add exported entries to a user's history, keeping their IDs and timestamps.
+
+    Entries whose ID already exists are skipped, so an interrupted import can
+    simply be sent again. Returns (imported, skipped).
+    """
+    user_dir = get_user_dir(uuid)
+    history_file = user_dir / "history.json"
+    imported = skipped = 0
+    
+    with _user_lock(uuid):
+        history = _read_hot(history_file)
+        known_ids = {entry.get('id') for entry in history}
+        for segment in load_index(user_dir):
+            known_ids.update(segment["ids"])
+        
+        version = None
+        for entry in entries:
+            entry_id = entry.get('id') or str(uuid_lib.uuid4())
+            if entry_id in known_ids:
+                skipped += 1
+                continue
+            entry['id'] = entry_id
+            entry.setdefault('timestamp', datetime.now().isoformat())
+            # One version for the whole batch
+            version = version or _next_version(user_dir)
+            entry['version'] = version
+            history.append(entry)
+            known_ids.add(entry_id)
+            imported += 1
+        
+        if imported:
+            _write_hot(history_file, history)
+            _bump_version(user_dir, "history")
+            _index_fingerprints(uuid, history[-imported:])
+            _record_analytics(user_dir, [], history[-imported:])
+        
+        # Keep the hot tier bounded during large imports
+        if len(history) > HISTORY_HOT_MAX_ENTRIES:
+            compact_history(uuid)
+    
+    return imported, skipped
+
+
+def _read_analytics(user_dir: Path) -> Optional[Dict[str, Any]]:
+    analytics_file = user_dir / "analytics.json"
+    if not analytics_file.exists():
+        return None
+    with open(analytics_file, 'r') as f:
+        return json.load(f)
+
+
+def _write_analytics(user_dir: Path, aggregates: Dict[str, Any]) -> None:
+    _write_atomic(user_dir / "analytics.json", json.dumps(aggregates, separators=(",", ":")))
+
+
+def _record_analytics(user_dir: Path, removed: List[Dict[str, Any]], added: List[Dict[str, Any]]) -> None:
+    """
+    Move the user's aggregates from the removed entry versions to the added ones. Caller holds the user lock.
+
+    Users without aggregates yet are left alone; they are built in full by
+    rebuild_analytics, on first read or by the backfill tool.
+    """
+    def contribution(entry: Dict[str, Any]) -> tuple:
+        return entry.get('status') or 'draft', entry_dimensions(entry)
+    
+    if len(removed) == len(added) == 1 and contribution(removed[0]) == contribution(added[0]):
+        return
+    try:
+        aggregates = _read_analytics(user_dir)
+        if aggregates is None:
+            return
+        for entry in removed:
+            apply_entry(aggregates, entry, -1)
+        for entry in added:
+            apply_entry(aggregates, entry)
+        _write_analytics(user_dir, aggregates)
+    except (OSError, ValueError) as e:
+        # Drop the stale aggregates so the next read rebuilds them
+        print(f"Updating analytics in {user_dir} failed: {e}")
+        (user_dir / "analytics.json").unlink(missing_ok=True)
+
+
+@profiled("storage:rebuild_analytics")
+def rebuild_analytics(uuid: str) -> int:
+    """Recompute a user's aggregates from their whole history and return the number of entries counted."""
+    user_dir = get_user_dir(uuid)
+    aggregates = empty_aggregates()
+    counted = 0
+    
+    with _user_lock(uuid):
+        for entry in iter_history(uuid):
+            apply_entry(aggregates, entry)
+            counted += 1
+        _write_analytics(user_dir, aggregates)
+    
+    return counted
+
+
+@profiled("storage:load_analytics")
+def load_analytics(uuid: str) -> Dict[str, Any]:
+    """Return the user's outreach aggregates, building them first if they don't exist yet."""
+    user_dir = get_user_dir(uuid)
+    
+    with _user_lock(uuid):
+        aggregates = _read_analytics(user_dir)
+        if aggregates is None:
+            rebuild_analytics(uuid)
+            aggregates = _read_analytics(user_dir)
+    
+    return aggregates
+
+
+def _fingerprint_source(uuid: str) -> Iterator[Tuple[str, str]]:
+    return ((entry.get('id'), entry.get('target_profile_text') or '') for entry in iter_history(uuid))
+
+
+def _index_fingerprints(uuid: str, entries: List[Dict[str, Any]]) -> None:
+    """Add entries to the near-duplicate index. Caller holds the user lock."""
+    try:
+        _fingerprints.add(
+            get_user_dir(uuid),
+            [(entry['id'], entry.get('target_profile_text') or '') for entry in entries],
+            lambda: _fingerprint_source(uuid)
+        )
+    except (OSError, ValueError) as e:
+        print(f"Fingerprinting history for {uuid} failed: {e}")
+
+
+@profiled("storage:find_similar_history")
+def find_similar_history(uuid: str, target_profile_text: str, threshold: float) -> List[Tuple[str, float]]:
+    """Return (entry_id, similarity) for history entries whose target text is a near-duplicate, best first."""
+    with _user_lock(uuid):
+        return _fingerprints.query(get_user_dir(uuid), target_profile_text, threshold, lambda: _fingerprint_source(uuid))
+
+
+@profiled("storage:load_history_changes")
+def load_history_changes(uuid: str, since: int) -> list:
+    """Return entries added or updated after version since, skipping archive segments with no such entries."""
+    user_dir = get_user_dir(uuid)
+    history_file = user_dir / "history.json"
+    
+    with _user_lock(uuid):
+        changed = {e.get('id'): e for e in _read_hot(history_file) if e.get('version', 0) > since}
+        for segment in load_index(user_dir):
+            if segment.get("max_version", since + 1) <= since:
+                continue
+            for entry in read_segment(user_dir / ARCHIVE_DIR / segment["file"]):
+                if entry.get('version', 0) > since:
+                    changed.setdefault(entry.get('id'), entry)
+    
+    return sorted(changed.values(), key=_sort_key)
@@ -0,0 +1,202 @@
+"""Provider-enforced JSON-schema completions with bounded repair."""
+import json
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError, create_model
+try:
+    from backend.logic.llm import chat_completion
+    from backend.logic.prompts import PromptTemplate
+except ImportError:
+    from logic.llm import chat_completion
+    from logic.prompts import PromptTemplate
+
+# Number of follow-up calls allowed to fix an invalid response
+MAX_REPAIR_ATTEMPTS = 2
+
+# Keywords that strict structured outputs reject; pydantic still validates them locally
+_UNSUPPORTED_KEYWORDS = ("default", "minLength", "maxLength")
+
+
+class StructuredOutputError(Exception):
+    """Raised when the model cannot produce output matching the schema."""
+
+
+def _strict_schema(node: Any) -> Any:
+    """Adapt a pydantic JSON schema to the provider's strict mode rules."""
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    node = {
+        key: _strict_schema(value)
+        for key, value in node.items()
+        if key not in _UNSUPPORTED_KEYWORDS
+    }
+    if node.get("type") == "object" and "properties" in node:
+        node["additionalProperties"] = False
+        node["required"] = list(node["properties"].keys())
+    return node
+
+
+def response_format_for(schema: Type[BaseModel]) -> Dict[str, Any]:
+    """Build the response_format parameter for a pydantic model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema.__name__,
+            "schema": _strict_schema(schema.model_json_schema()),
+            "strict": True
+        }
+    }
+
+
+def _validate(content: Optional[str], schema: Type[BaseModel]) -> Tuple[Optional[BaseModel], Optional[Dict[str, Any]], List[str], str]:
+    """
+    Validate raw model output against the schema.
+
+    Returns (model, partial_data, invalid_fields, error_text). When the output
+    is not a JSON object at all, partial_data is None and the whole response
+    has to be requested again.
+    """
+    try:
+        data = json.loads(content or "")
+    except json.JSONDecodeError as e:
+        return None, None, [], f"invalid JSON: {e}"
+
+    if not isinstance(data, dict):
+        return None, None, [], "expected a JSON object"
+
+    try:
+        return schema.model_validate(data), data, [], ""
+    except ValidationError as e:
+        invalid_fields = sorted({
+            str(err["loc"][0]) for err in e.errors()
+            if err["loc"] and str(err["loc"][0]) in schema.model_fields
+        })
+        if not invalid_fields:
+            return None, None, [], str(e)
+        return None, data, invalid_fields, str(e)
+
+
+def _partial_schema(schema: Type[BaseModel], field_names: List[str]) -> Type[BaseModel]:
+    """Build a model containing only the given fields of the schema."""
+    fields = {
+        name: (schema.model_fields[name].annotation, schema.model_fields[name])
+        for name in field_names
+    }
+    return create_model(f"{schema.__name__}Repair", **fields)
+
+
+def _request(
+    client,
+    template: PromptTemplate,
+    model: str,
+    messages: List[Dict[str, str]],
+    schema: Type[BaseModel],
+    temperature: float,
+    n: int = 1
+) -> List[Optional[str]]:
+    """Make one schema-constrained call and return the content of each choice."""
+    params: Dict[str, Any] = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "response_format": response_format_for(schema)
+    }
+    if n > 1:
+        params["n"] = n
+    response = chat_completion(client, template, **params)
+
+    contents = []
+    for choice in response.choices:
+        if getattr(choice.message, "refusal", None):
+            raise StructuredOutputError(f"Model refused to answer: {choice.message.refusal}")
+        contents.append(choice.message.content)
+    return contents
+
+
+def _resolve(
+    client,
+    template: PromptTemplate,
+    model: str,
+    messages: List[Dict[str, str]],
+    schema: Type[BaseModel],
+    temperature: float,
+    content: Optional[str],
+    max_repairs: int
+) -> BaseModel:
+    """Validate a response, repairing only its invalid part with follow-up calls."""
+    error = ""
+    for attempt in range(max_repairs + 1):
+        result, partial, invalid_fields, error = _validate(content, schema)
+        if result is not None:
+            return result
+
+        if attempt == max_repairs:
+            break
+
+        if partial is None:
+            # Nothing salvageable; ask for the complete object again
+            content = _request(client, template, model, messages + [
+                {"role": "assistant", "content": content or ""},
+                {"role": "user", "content": f"Your previous response was not valid ({error}). Return the complete JSON object again, matching the schema exactly."}
+            ], schema, temperature)[0]
+            continue
+
+        invalid_json = json.dumps({name: partial.get(name) for name in invalid_fields})
+        repaired_content = _request(client, template, model, messages + [
+            {"role": "assistant", "content": content or ""},
+            {"role": "user", "content": f"These fields in your previous response were invalid: {invalid_json}\nValidation errors: {error}\nReturn a JSON object containing ONLY the corrected fields: {', '.join(invalid_fields)}."}
+        ], _partial_schema(schema, invalid_fields), temperature)[0]
+
+        # Merge the repaired fields back into the earlier partial result
+        try:
+            repaired = json.loads(repaired_content or "")
+        except json.JSONDecodeError:
+            repaired = None
+        content = json.dumps({**partial, **repaired}) if isinstance(repaired, dict) else repaired_content
+
+    raise StructuredOutputError(f"{schema.__name__} output was still invalid after {max_repairs} repair attempts: {error}")
+
+
+def complete_structured(
+    client,
+    template: PromptTemplate,
+    model: str,
+    messages: List[Dict[str, str]],
+    schema: Type[BaseModel],
+    temperature: float,
+    max_repairs: int = MAX_REPAIR_ATTEMPTS
+) -> BaseModel:
+    """
+    Request a completion that must match the schema.
+
+    Invalid responses are repaired by re-asking only for the fields that
+    failed validation (or the whole object if it could not be parsed), up to
+    max_repairs extra calls. Raises StructuredOutputError if that fails.
+    """
+    content = _request(client, template, model, messages, schema, temperature)[0]
+    return _resolve(client, template, model, messages, schema, temperature, content, max_repairs)
+
+
+def complete_structured_variants(
+    client,
+    template: PromptTemplate,
+    model: str,
+    messages: List[Dict[str, str]],
+    schema: Type[BaseModel],
+    temperature: float,
+    n: int,
+    max_repairs: int = MAX_REPAIR_ATTEMPTS
+) -> List[BaseModel]:
+    """
+    Request n independent completions matching the schema in a single call.
+
+    Each choice is validated and repaired on its own, as in complete_structured.
+    """
+    contents = _request(client, template, model, messages, schema, temperature, n=n)
+    return [
+        _resolve(client, template, model, messages, schema, temperature, content, max_repairs)
+        for content in contents
+    ]
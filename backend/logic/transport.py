@@ -0,0 +1,268 @@
+"""Record/replay of provider traffic for offline, reproducible benchmarks."""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+# Response headers that describe the wire encoding rather than the body we store
+_DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+
+def transport_mode() -> str:
+    """Return the LLM_TRANSPORT_MODE setting: off, record or replay."""
+    mode = os.getenv("LLM_TRANSPORT_MODE", OFF).lower()
+    return mode if mode in (RECORD, REPLAY) else OFF
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no recording matches a request."""
+
+
+class Redactor:
+    """Replaces matches of a regex with a placeholder in recorded bodies."""
+
+    def __init__(self, pattern: Optional[str]):
+        self._regex = re.compile(pattern) if pattern else None
+
+    def __call__(self, text: str) -> str:
+        if self._regex is None:
+            return text
+        return self._regex.sub("[REDACTED]", text)
+
+
+def _canonical_body(raw: bytes, redact: Redactor) -> Any:
+    """Decode a body as JSON where possible so cassettes stay readable and diffable."""
+    if not raw:
+        return None
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(raw).decode("ascii")}
+    text = redact(text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _body_bytes(body: Any) -> bytes:
+    if body is None:
+        return b""
+    if isinstance(body, dict) and set(body) == {"base64"}:
+        return base64.b64decode(body["base64"])
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return json.dumps(body).encode("utf-8")
+
+
+def interaction_key(service: str, method: str, path: str, body: Any) -> str:
+    """Stable key for matching a request to its recording."""
+    payload = json.dumps([service, method, path, body], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Gzip-compressed JSON Lines file of recorded interactions.
+
+    Each recording is appended as its own gzip member, so recording is
+    crash-safe and concurrent writers only contend on one lock. In replay,
+    identical requests are served their recordings in the order they were
+    made, cycling once all have been used.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_route: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self._key_cursor: Dict[str, int] = defaultdict(int)
+        self._route_queue: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = {}
+        self._stats = {"recorded": 0, "replayed": 0, "route_fallbacks": 0, "misses": 0}
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        self._by_key[entry["key"]].append(entry)
+        self._by_route[(entry["service"], entry["method"], entry["path"])].append(entry)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+            self._index(entry)
+            self._stats["recorded"] += 1
+
+    def find(self, key: str, route: Tuple[str, str, str], allow_route_fallback: bool) -> Dict[str, Any]:
+        """
+        Return the recording for key, or with allow_route_fallback the next
+        recording for the same endpoint (useful after a prompt change).
+        """
+        with self._lock:
+            entries = self._by_key.get(key)
+            if entries:
+                entry = entries[self._key_cursor[key] % len(entries)]
+                self._key_cursor[key] += 1
+                self._stats["replayed"] += 1
+                return entry
+
+            if allow_route_fallback and self._by_route.get(route):
+                queue = self._route_queue.get(route)
+                if not queue:
+                    queue = self._route_queue[route] = deque(self._by_route[route])
+                self._stats["replayed"] += 1
+                self._stats["route_fallbacks"] += 1
+                return queue.popleft()
+
+            self._stats["misses"] += 1
+        raise CassetteMiss(f"No recording for {route[1]} {route[2]} in {self.path}")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"path": self.path, "recordings": sum(len(v) for v in self._by_key.values()), **self._stats}
+
+
+class RecordReplayTransport(httpx.BaseTransport):
+    """
+    httpx transport that records provider traffic to a cassette or replays it.
+
+    Request headers (and with them API keys) are never stored. Replayed
+    responses wait for the recorded latency times latency_scale, so 1.0
+    reproduces the original timing and 0 replays as fast as possible.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        cassette: Cassette,
+        service: str = "openai",
+        redact: Optional[Redactor] = None,
+        latency_scale: float = 1.0,
+        route_fallback: bool = True,
+        inner: Optional[httpx.BaseTransport] = None
+    ):
+        self.mode = mode
+        self.cassette = cassette
+        self.service = service
+        self.redact = redact or Redactor(None)
+        self.latency_scale = latency_scale
+        self.route_fallback = route_fallback
+        self._inner = inner or (httpx.HTTPTransport() if mode == RECORD else None)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request_body = _canonical_body(request.read(), self.redact)
+        method, path = request.method, request.url.path
+        key = interaction_key(self.service, method, path, request_body)
+
+        if self.mode == REPLAY:
+            entry = self.cassette.find(key, (self.service, method, path), self.route_fallback)
+            if self.latency_scale > 0:
+                time.sleep(entry["elapsed_ms"] / 1000 * self.latency_scale)
+            response = entry["response"]
+            return httpx.Response(
+                response["status"],
+                headers=response["headers"],
+                content=_body_bytes(response["body"]),
+                request=request
+            )
+
+        start = time.perf_counter()
+        response = self._inner.handle_request(request)
+        content = response.read()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_RESPONSE_HEADERS}
+        self.cassette.append({
+            "service": self.service,
+            "key": key,
+            "method": method,
+            "path": path,
+            "request": request_body,
+            "response": {"status": response.status_code, "headers": headers, "body": _canonical_body(content, self.redact)},
+            "elapsed_ms": round(elapsed_ms, 1)
+        })
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    def close(self) -> None:
+        if self._inner is not None:
+            self._inner.close()
+
+
+class RecordReplaySearchClient:
+    """
+    Records or replays Exa search calls, which do not go through httpx.
+
+    Results are stored as plain title/url/text records and replayed as
+    attribute objects with the same shape SearchAgent reads.
+    """
+
+    def __init__(self, client, mode: str, cassette: Cassette, redact: Optional[Redactor] = None, latency_scale: float = 1.0, route_fallback: bool = True):
+        self._client = client
+        self.mode = mode
+        self.cassette = cassette
+        self.redact = redact or Redactor(None)
+        self.latency_scale = latency_scale
+        self.route_fallback = route_fallback
+
+    def search(self, query: str, **kwargs: Any):
+        request_body = json.loads(self.redact(json.dumps({"query": query, **kwargs}, sort_keys=True)))
+        key = interaction_key("exa", "SEARCH", "/search", request_body)
+
+        if self.mode == REPLAY:
+            entry = self.cassette.find(key, ("exa", "SEARCH", "/search"), self.route_fallback)
+            if self.latency_scale > 0:
+                time.sleep(entry["elapsed_ms"] / 1000 * self.latency_scale)
+            if entry["response"].get("error"):
+                raise RuntimeError(entry["response"]["error"])
+            return SimpleNamespace(results=[SimpleNamespace(**r) for r in entry["response"]["results"]])
+
+        start = time.perf_counter()
+        error = None
+        try:
+            search_results = self._client.search(query=query, **kwargs)
+        except Exception as e:
+            error = e
+        response: Dict[str, Any] = {"error": self.redact(str(error))} if error else {
+            "results": [
+                {
+                    "title": self.redact(r.title or ""),
+                    "url": r.url or "",
+                    "text": self.redact(r.text or "")
+                }
+                for r in search_results.results
+            ]
+        }
+        self.cassette.append({
+            "service": "exa",
+            "key": key,
+            "method": "SEARCH",
+            "path": "/search",
+            "request": request_body,
+            "response": response,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+        })
+        if error:
+            raise error
+        return search_results
@@ -1,50 +1,117 @@
 """FastAPI backend for Profile-to-Profile Outreach Engine."""
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+import itertools
+import json
 import os
 import re
+import zlib
 from dotenv import load_dotenv
 
 try:
     # Try absolute imports (for local development)
     from backend.agents.extractor_agent import ExtractorAgent
     from backend.agents.overlap_agent import OverlapAgent
+    from backend.agents.fused_analysis_agent import FusedAnalysisAgent
     from backend.agents.search_agent import SearchAgent
     from backend.agents.message_draft_agent import MessageDraftAgent
     from backend.agents.refinement_agent import RefinementAgent
     from backend.agents.followup_agent import FollowUpAgent
+    from backend.logic.analytics import summarize
+    from backend.logic.cache import get_cache
+    from backend.logic.connection_templates import VARIETIES, connection_templates, current_companies, local_overlap
+    from backend.logic.profile_parser import parse_profile
+    from backend.logic.profile_sections import change_ratio
+    from backend.logic.quotas import Overloaded, QuotaExceeded, quota_tracker, retry_after_header
     from backend.logic.sanitizer import sanitize_input
+    from backend.logic.structured_output import StructuredOutputError
+    from backend.logic.resilience import DeadlineExceeded, get_resilience_metrics, stage_deadline
     from backend.logic.storage import (
+        find_similar_history,
+        load_analytics,
         save_user_profile,
         load_user_profile,
         load_user_embedding,
+        load_user_profile_source,
         save_history_entry,
         load_history,
-        update_history_entry
+        load_history_entry,
+        update_history_entry,
+        compact_history,
+        list_user_ids,
+        iter_history,
+        import_history_entries,
+        get_versions,
+        load_history_changes
     )
     from backend.logic.context_parser import parse_context_note
     from backend.logic.embeddings import generate_embedding
+    from backend.logic.clients import transport_metrics
+    from backend.logic.llm import get_usage_metrics
+    from backend.logic.prefetch import PrefetchCache, prefetch_key
+    from backend.logic.followup_worker import FollowUpPregenerator, followup_inputs_hash
+    from backend.logic.history_archive import HistoryCompactor
+    from backend.logic.scheduler import BACKGROUND, BULK, INTERACTIVE, llm_priority, llm_scheduler
+    from backend.logic.profiling import (
+        PROFILE_HEADER, PROFILE_ID_HEADER, check_admin_token, profile_request, profile_store, profiled,
+        profiling_enabled, should_profile
+    )
 except ImportError:
     # Fall back to relative imports (for Render deployment)
     from agents.extractor_agent import ExtractorAgent
     from agents.overlap_agent import OverlapAgent
+    from agents.fused_analysis_agent import FusedAnalysisAgent
     from agents.search_agent import SearchAgent
     from agents.message_draft_agent import MessageDraftAgent
     from agents.refinement_agent import RefinementAgent
     from agents.followup_agent import FollowUpAgent
+    from logic.analytics import summarize
+    from logic.cache import get_cache
+    from logic.connection_templates import VARIETIES, connection_templates, current_companies, local_overlap
+    from logic.profile_parser import parse_profile
+    from logic.profile_sections import change_ratio
+    from logic.quotas import Overloaded, QuotaExceeded, quota_tracker, retry_after_header
     from logic.sanitizer import sanitize_input
+    from logic.structured_output import StructuredOutputError
+    from logic.resilience import DeadlineExceeded, get_resilience_metrics, stage_deadline
     from logic.storage import (
+        find_similar_history,
+        load_analytics,
         save_user_profile,
         load_user_profile,
         load_user_embedding,
+        load_user_profile_source,
         save_history_entry,
         load_history,
-        update_history_entry
+        load_history_entry,
+        update_history_entry,
+        compact_history,
+        list_user_ids,
+        iter_history,
+        import_history_entries,
+        get_versions,
+        load_history_changes
     )
     from logic.context_parser import parse_context_note
     from logic.embeddings import generate_embedding
+    from logic.clients import transport_metrics
+    from logic.llm import get_usage_metrics
+    from logic.prefetch import PrefetchCache, prefetch_key
+    from logic.followup_worker import FollowUpPregenerator, followup_inputs_hash
+    from logic.history_archive import HistoryCompactor
+    from logic.scheduler import BACKGROUND, BULK, INTERACTIVE, llm_priority, llm_scheduler
+    from logic.profiling import (
+        PROFILE_HEADER, PROFILE_ID_HEADER, check_admin_token, profile_request, profile_store, profiled,
+        profiling_enabled, should_profile
+    )
 
 # Load environment variables
 load_dotenv()
@@ -64,11 +131,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Retry-After"],
 )
 
+# Compress larger responses (history, exports) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+# Number of API requests currently being served; background work waits for zero
+_inflight_requests = 0
+
+
+@app.middleware("http")
+async def track_inflight_requests(request: Request, call_next):
+    global _inflight_requests
+    _inflight_requests += 1
+    try:
+        return await call_next(request)
+    finally:
+        _inflight_requests -= 1
+
+
+# Opt-in request profiling; the middleware is only installed when ADMIN_TOKEN is set
+if profiling_enabled():
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        if not should_profile(request.headers.get(PROFILE_HEADER)):
+            return await call_next(request)
+        with profile_request(request.method, request.url.path) as session:
+            response = await call_next(request)
+            session.status_code = response.status_code
+        response.headers[PROFILE_ID_HEADER] = session.id
+        return response
+
+
 # Initialize agents
 extractor_agent = ExtractorAgent()
 overlap_agent = OverlapAgent()
+fused_analysis_agent = FusedAnalysisAgent()
 try:
     search_agent = SearchAgent()
 except Exception as e:
@@ -78,6 +177,21 @@ message_draft_agent = MessageDraftAgent()
 refinement_agent = RefinementAgent()
 followup_agent = FollowUpAgent()
 
+# Fused mode extracts the target and finds overlaps in a single LLM call
+FUSED_PIPELINE = os.getenv("FUSED_PIPELINE", "").lower() in ("1", "true", "yes")
+
+# Profile edits that change less than this fraction of lines keep the stored embedding
+PROFILE_REEMBED_THRESHOLD = float(os.getenv("PROFILE_REEMBED_THRESHOLD", "0.1"))
+
+# History keeps this much of each target profile, which is also what near-duplicate matching compares
+HISTORY_TARGET_TEXT_CHARS = 500
+
+# Minimum estimated similarity for a target to count as already in history
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+
+# Target analyses started on paste, held briefly for the following generate call
+prefetch_cache = PrefetchCache(ttl_seconds=int(os.getenv("PREFETCH_TTL_SECONDS", "120")))
+
 
 def _extract_first_name(profile_text: str) -> str | None:
     """Lightweight heuristic to capture a contact's first name from profile text."""
@@ -115,6 +229,7 @@ def _extract_company(target_profile: dict, profile_text: str) -> str | None:
     return None
 
 
+@profiled("derive_contact_details")
 def _derive_contact_details(target_profile: dict, profile_text: str) -> dict:
     """Return a small bundle of contact metadata for consistent history titles."""
     name = None
@@ -134,6 +249,131 @@ def _derive_contact_details(target_profile: dict, profile_text: str) -> dict:
     return {"contact_name": name, "contact_company": company}
 
 
+@profiled("analyze_target")
+def _analysis_deadline(use_fused: bool) -> float:
+    """Longest a target analysis can take: the deadlines of the LLM stages it runs in sequence."""
+    if use_fused:
+        return stage_deadline("fused_analysis")
+    return stage_deadline("extractor") + stage_deadline("overlap")
+
+
+def _analyze_target(user_profile: dict, target_profile_text: str, use_fused: bool) -> dict:
+    """Run extraction, overlap and search for a sanitized target profile."""
+    if use_fused:
+        # Extract target profile and find overlaps in one call
+        analysis = fused_analysis_agent.extract_and_find_overlaps(user_profile, target_profile_text)
+        target_profile = analysis["target_profile"]
+        overlap_summary = analysis["overlap_summary"]
+    else:
+        # Extract target profile
+        target_profile = extractor_agent.extract(target_profile_text)
+        
+        # Find overlaps
+        overlap_summary = overlap_agent.find_overlaps(user_profile, target_profile)
+    
+    # Search for insights
+    exa_results = []
+    if search_agent:
+        try:
+            exa_results = search_agent.search(target_profile)
+        except Exception as e:
+            print(f"Exa search failed: {e}")
+            exa_results = []  # Continue without Exa results
+    
+    return {
+        "target_profile": target_profile,
+        "overlap_summary": overlap_summary,
+        "exa_results": exa_results
+    }
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if header.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+
+def _conditional_json(request: Request, etag: str, modified: float, build: Callable[[], Dict[str, Any]]) -> Response:
+    """
+    Return 304 if the client's copy is current, otherwise the JSON from build().
+
+    Responses carry the ETag, Last-Modified and Cache-Control: no-cache, so
+    browsers revalidate on every load and usually get an empty 304.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if modified:
+        headers["Last-Modified"] = formatdate(modified, usegmt=True)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    not_modified = False
+    if if_none_match:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since and modified:
+        try:
+            not_modified = int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            not_modified = False
+    
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(build(), headers=headers)
+
+
+def _find_history_entry(uuid: str, history_id: str) -> dict | None:
+    """Return a single history entry by ID."""
+    return load_history_entry(uuid, history_id)
+
+
+def _pregenerate_followup(uuid: str, history_id: str) -> None:
+    """Generate and store a follow-up candidate for a draft history entry."""
+    user_profile = load_user_profile(uuid)
+    entry = _find_history_entry(uuid, history_id)
+    if not user_profile or not entry or entry.get("status", "draft") != "draft":
+        return
+    
+    inputs_hash = followup_inputs_hash(entry, user_profile)
+    if (entry.get("followup_candidate") or {}).get("inputs_hash") == inputs_hash:
+        return
+    
+    with llm_priority(BACKGROUND, uuid):
+        followup_message = followup_agent.generate_followup(
+            original_outreach=entry,
+            user_profile=user_profile,
+            target_profile=entry.get("target_profile", {})
+        )
+    update_history_entry(uuid, history_id, {
+        "followup_candidate": {
+            "message": followup_message,
+            "inputs_hash": inputs_hash,
+            "generated_at": datetime.now().isoformat()
+        }
+    })
+
+
+# Optionally pre-generate follow-ups for new drafts while the service is idle
+followup_pregenerator = None
+if os.getenv("FOLLOWUP_PREGENERATION", "").lower() in ("1", "true", "yes"):
+    followup_pregenerator = FollowUpPregenerator(
+        generate=_pregenerate_followup,
+        is_idle=lambda: _inflight_requests == 0
+    )
+    followup_pregenerator.start()
+
+# Periodically move older history entries into compressed archive segments
+history_compactor = None
+_compaction_interval = float(os.getenv("HISTORY_COMPACTION_INTERVAL_SECONDS", "3600"))
+if _compaction_interval > 0:
+    history_compactor = HistoryCompactor(
+        compact=compact_history,
+        list_users=list_user_ids,
+        interval_seconds=_compaction_interval
+    )
+    history_compactor.start()
+
+
 # Request/Response models
 class ProfileRequest(BaseModel):
     uuid: str
@@ -149,6 +389,56 @@ class OutreachRequest(BaseModel):
     uuid: str
     target_profile: str
     context_note: Optional[str] = ""
+    fused: Optional[bool] = None  # Defaults to the FUSED_PIPELINE setting
+    variants: int = Field(default=1, ge=1, le=5)  # Draft sets generated in one completion
+    # When the target is already in history: "ignore" it, "offer" it back (409), or "reuse" it
+    duplicate_policy: str = Field(default="ignore", pattern="^(ignore|offer|reuse)$")
+
+
+class PrefetchRequest(BaseModel):
+    uuid: str
+    target_profile: str
+    fused: Optional[bool] = None
+
+
+class PrefetchResponse(BaseModel):
+    success: bool
+    started: bool
+
+
+class ConnectionRequestRequest(BaseModel):
+    uuid: str
+    target_profile: str
+    context_note: Optional[str] = ""
+    fused: Optional[bool] = None  # Which prefetched analysis to look for
+    variety: str = Field(default="rotate", pattern=f"^({'|'.join(VARIETIES)})$")
+    count: int = Field(default=1, ge=1, le=5)
+
+
+class ConnectionRequestOption(BaseModel):
+    message: str
+    template_id: str
+    hook: str
+
+
+class ConnectionRequestResponse(BaseModel):
+    success: bool
+    linkedin_connection_request: str
+    options: List[ConnectionRequestOption]
+    overlap_source: str  # "prefetch" when a finished prefetched analysis was used, else "local"
+
+
+class DraftVariant(BaseModel):
+    linkedin_connection_request: str
+    cold_outreach_email: str
+    followup_template: str
+
+
+class DuplicateMatch(BaseModel):
+    history_id: str
+    similarity: float
+    timestamp: Optional[str] = None
+    contact_name: Optional[str] = None
 
 
 class OutreachResponse(BaseModel):
@@ -157,6 +447,8 @@ class OutreachResponse(BaseModel):
     cold_outreach_email: str
     followup_template: str
     history_id: str
+    variants: Optional[List[DraftVariant]] = None
+    duplicate_of: Optional[DuplicateMatch] = None  # Earlier entry reused for a repeat target
 
 
 class RefinementRequest(BaseModel):
@@ -186,28 +478,57 @@ def root():
     return {"message": "Profile-to-Profile Outreach Engine API"}
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Return LLM usage metrics, including provider-cached prompt tokens, per prompt template."""
+    return {
+        "prompts": get_usage_metrics(),
+        "scheduler": llm_scheduler.metrics(),
+        "resilience": get_resilience_metrics(),
+        "search": search_agent.metrics() if search_agent else {"state": "disabled"},
+        "transport": transport_metrics(),
+        "cache": get_cache().metrics(),
+        "quotas": quota_tracker.metrics()
+    }
+
+
 @app.get("/api/user/profile")
-async def check_profile(uuid: str):
+async def check_profile(uuid: str, request: Request):
     """Check if user profile exists."""
-    from backend.logic.storage import get_user_dir
-    from pathlib import Path
-    import json
+    # Read versions before data, so a concurrent write can only make the ETag stale, never the body
+    versions = get_versions(uuid)
     
-    profile = load_user_profile(uuid)
-    if profile:
-        # Try to get the original profile text if stored
-        user_dir = get_user_dir(uuid)
-        profile_text = ""
-        # We don't store the original text, so we'll just return that profile exists
-        return {
-            "exists": True,
-            "profile": profile
-        }
-    return {"exists": False}
+    def build() -> Dict[str, Any]:
+        profile = load_user_profile(uuid)
+        if profile:
+            return {
+                "exists": True,
+                "profile": profile
+            }
+        return {"exists": False}
+    
+    return _conditional_json(request, f'W/"p{versions["profile_version"]}"', versions["profile_modified"], build)
+
+
+def _admit(uuid: str, priority: int, key: Optional[str] = None) -> bool:
+    """
+    Turn the request away before any LLM call if uuid is over quota (429) or the service is overloaded (503).
+
+    Call after validating the request, so malformed requests don't count against the quota.
+    key names the work for quota_tracker credits (the prefetch key for target analyses).
+    Returns whether the request was counted.
+    """
+    try:
+        return quota_tracker.admit(uuid, priority, key)
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=retry_after_header(e.retry_after))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_after_header(e.retry_after))
 
 
 @app.post("/api/user/profile", response_model=ProfileResponse)
-async def save_profile(request: ProfileRequest):
+@profiled("endpoint:save_profile")
+def save_profile(request: ProfileRequest):
     """Save and embed user profile."""
     try:
         # Sanitize input
@@ -216,25 +537,147 @@ async def save_profile(request: ProfileRequest):
         if not profile_text:
             raise HTTPException(status_code=400, detail="Profile text cannot be empty")
         
-        # Extract structured data
-        profile_data = extractor_agent.extract(profile_text)
+        _admit(request.uuid, BULK)
+        
+        previous_text, previous_chunks = load_user_profile_source(request.uuid)
         
-        # Generate embedding
-        embedding = generate_embedding(profile_text)
+        with llm_priority(BULK, request.uuid):
+            # Extract structured data, re-extracting only the chunks that changed
+            profile_data, chunks, reextracted = extractor_agent.extract_incremental(
+                profile_text, previous_chunks
+            )
+            
+            # Small edits keep the stored embedding
+            embedding = None
+            if previous_text is not None and change_ratio(previous_text, profile_text) < PROFILE_REEMBED_THRESHOLD:
+                embedding = load_user_embedding(request.uuid)
+            reembedded = embedding is None
+            if reembedded:
+                embedding = generate_embedding(profile_text)
         
         # Save profile and embedding
-        save_user_profile(request.uuid, profile_data, embedding)
+        save_user_profile(request.uuid, profile_data, embedding, profile_text=profile_text, chunks=chunks)
         
+        message = "Profile saved successfully"
+        if previous_text is not None:
+            message += f" ({reextracted} of {len(chunks)} chunks re-extracted"
+            message += ", embedding updated)" if reembedded else ", embedding unchanged)"
         return ProfileResponse(
             success=True,
-            message="Profile saved successfully"
+            message=message
+        )
+    except HTTPException:
+        raise
+    except StructuredOutputError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/outreach/prefetch", response_model=PrefetchResponse)
+@profiled("endpoint:prefetch")
+def prefetch_outreach(request: PrefetchRequest):
+    """Start analysing a pasted target profile before the user clicks Generate."""
+    user_profile = load_user_profile(request.uuid)
+    if not user_profile:
+        raise HTTPException(status_code=404, detail="User profile not found. Please save your profile first.")
+    
+    target_profile_text = sanitize_input(request.target_profile)
+    if not target_profile_text:
+        raise HTTPException(status_code=400, detail="Target profile cannot be empty")
+    
+    use_fused = FUSED_PIPELINE if request.fused is None else request.fused
+    key = prefetch_key(request.uuid, user_profile, target_profile_text, use_fused)
+    _admit(request.uuid, BULK)
+    with llm_priority(BULK, request.uuid):
+        started = prefetch_cache.submit(key, _analyze_target, user_profile, target_profile_text, use_fused)
+    
+    # Only a prefetch that started work is charged, and the generate that uses it is not
+    if started:
+        quota_tracker.credit(request.uuid, key)
+    else:
+        quota_tracker.refund(request.uuid)
+    
+    return PrefetchResponse(success=True, started=started)
+
+
+@profiled("find_duplicate")
+def _find_duplicate(uuid: str, target_profile_text: str) -> Optional[tuple]:
+    """Return (entry, DuplicateMatch) for the closest earlier outreach to the same target, if any."""
+    matches = find_similar_history(uuid, target_profile_text[:HISTORY_TARGET_TEXT_CHARS], NEAR_DUPLICATE_THRESHOLD)
+    for history_id, similarity in matches:
+        entry = load_history_entry(uuid, history_id)
+        if entry:
+            summary = _history_summary(entry)
+            return entry, DuplicateMatch(
+                history_id=history_id,
+                similarity=round(similarity, 3),
+                timestamp=summary["timestamp"],
+                contact_name=summary["contact_name"]
+            )
+    return None
+
+
+def _can_reuse_drafts(entry: dict, context_note: str, variants: int) -> bool:
+    """Earlier drafts fit when they were written for the same context note and variant count."""
+    if (entry.get("context_note") or "") != context_note:
+        return False
+    return len(entry.get("variants") or [None]) == variants
+
+
+@app.post("/api/outreach/connection-request", response_model=ConnectionRequestResponse)
+@profiled("endpoint:connection_request")
+def template_connection_request(request: ConnectionRequestRequest):
+    """Draft a LinkedIn connection request from templates, without any LLM call."""
+    try:
+        user_profile = load_user_profile(request.uuid)
+        if not user_profile:
+            raise HTTPException(status_code=404, detail="User profile not found. Please save your profile first.")
+        
+        target_profile_text = sanitize_input(request.target_profile)
+        if not target_profile_text:
+            raise HTTPException(status_code=400, detail="Target profile cannot be empty")
+        context_attributes = parse_context_note(sanitize_input(request.context_note or ""))
+        
+        # A finished prefetch has the LLM's overlap; otherwise match the parsed profiles locally
+        use_fused = FUSED_PIPELINE if request.fused is None else request.fused
+        prefetched = prefetch_cache.finished(prefetch_key(request.uuid, user_profile, target_profile_text, use_fused))
+        if prefetched:
+            target_profile = prefetched["target_profile"]
+            overlap_summary = prefetched["overlap_summary"]
+            overlap_source = "prefetch"
+        else:
+            target_profile, _ = parse_profile(target_profile_text)
+            overlap_summary = local_overlap(user_profile, target_profile)
+            overlap_source = "local"
+        
+        options = connection_templates.draft(
+            request.uuid,
+            _extract_first_name(target_profile_text),
+            overlap_summary,
+            context_attributes,
+            variety=request.variety,
+            count=request.count,
+            seed=target_profile_text,
+            current=current_companies(user_profile, target_profile)
+        )
+        return ConnectionRequestResponse(
+            success=True,
+            linkedin_connection_request=options[0]["message"],
+            options=options,
+            overlap_source=overlap_source
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/outreach/generate", response_model=OutreachResponse)
-async def generate_outreach(request: OutreachRequest):
+@profiled("endpoint:generate")
+def generate_outreach(request: OutreachRequest):
     """Generate outreach messages."""
     try:
         # Load user profile
@@ -249,37 +692,85 @@ async def generate_outreach(request: OutreachRequest):
         if not target_profile_text:
             raise HTTPException(status_code=400, detail="Target profile cannot be empty")
         
+        use_fused = FUSED_PIPELINE if request.fused is None else request.fused
+        key = prefetch_key(request.uuid, user_profile, target_profile_text, use_fused)
+        charged = _admit(request.uuid, BULK, key)
+        
         # Parse context note
         context_attributes = parse_context_note(context_note)
         
-        # Extract target profile
-        target_profile = extractor_agent.extract(target_profile_text)
-        
-        # Find overlaps
-        overlap_summary = overlap_agent.find_overlaps(user_profile, target_profile)
+        # Repeat targets: offer the earlier outreach back, or reuse what it computed
+        analysis = None
+        duplicate = None
+        if request.duplicate_policy != "ignore":
+            duplicate = _find_duplicate(request.uuid, target_profile_text)
+        if duplicate:
+            prior, match = duplicate
+            if request.duplicate_policy == "offer":
+                # Nothing was generated; the retry after the user's choice is the charged request
+                if charged:
+                    quota_tracker.refund(request.uuid)
+                else:
+                    quota_tracker.credit(request.uuid, key)
+                raise HTTPException(status_code=409, detail={
+                    "message": "Outreach for this target is already in your history",
+                    "duplicate": match.model_dump()
+                })
+            if _can_reuse_drafts(prior, context_note, request.variants):
+                return OutreachResponse(
+                    success=True,
+                    linkedin_connection_request=prior["linkedin_connection_request"],
+                    cold_outreach_email=prior["cold_outreach_email"],
+                    followup_template=prior["followup_template"],
+                    history_id=prior["id"],
+                    variants=prior.get("variants"),
+                    duplicate_of=match
+                )
+            if all(key in prior for key in ("target_profile", "overlap_summary", "exa_results")):
+                analysis = {key: prior[key] for key in ("target_profile", "overlap_summary", "exa_results")}
         
-        # Search for insights
-        exa_results = []
-        if search_agent:
+        # Reuse a speculative analysis started by /api/outreach/prefetch if there is one
+        if analysis is None:
             try:
-                exa_results = search_agent.search(target_profile)
+                analysis = prefetch_cache.claim(key, timeout=_analysis_deadline(use_fused))
+            except FuturesTimeoutError:
+                raise DeadlineExceeded("Prefetched analysis did not finish within its deadline")
             except Exception as e:
-                print(f"Exa search failed: {e}")
-                exa_results = []  # Continue without Exa results
+                print(f"Prefetched analysis failed, recomputing: {e}")
+        if analysis is None:
+            with llm_priority(BULK, request.uuid):
+                analysis = _analyze_target(user_profile, target_profile_text, use_fused)
+        
+        target_profile = analysis["target_profile"]
+        overlap_summary = analysis["overlap_summary"]
+        exa_results = analysis["exa_results"]
         
         # Draft messages
-        messages = message_draft_agent.draft_messages(
-            user_profile=user_profile,
-            target_profile=target_profile,
-            overlap_summary=overlap_summary,
-            context_attributes=context_attributes,
-            exa_results=exa_results
-        )
+        variants = None
+        with llm_priority(BULK, request.uuid):
+            if request.variants > 1:
+                variants = message_draft_agent.draft_message_variants(
+                    user_profile=user_profile,
+                    target_profile=target_profile,
+                    overlap_summary=overlap_summary,
+                    context_attributes=context_attributes,
+                    exa_results=exa_results,
+                    variants=request.variants
+                )
+                messages = variants[0]
+            else:
+                messages = message_draft_agent.draft_messages(
+                    user_profile=user_profile,
+                    target_profile=target_profile,
+                    overlap_summary=overlap_summary,
+                    context_attributes=context_attributes,
+                    exa_results=exa_results
+                )
         
         # Save to history
         contact_meta = _derive_contact_details(target_profile, target_profile_text)
         history_entry = {
-            "target_profile_text": target_profile_text[:500],  # Store truncated version
+            "target_profile_text": target_profile_text[:HISTORY_TARGET_TEXT_CHARS],  # Store truncated version
             "target_profile": target_profile,
             "context_note": context_note,
             "context_attributes": context_attributes,
@@ -291,24 +782,38 @@ async def generate_outreach(request: OutreachRequest):
             "status": "draft",
             **contact_meta,
         }
+        if variants:
+            # All variants live under one entry; the top-level fields hold the first
+            history_entry["variants"] = variants
+        if duplicate:
+            history_entry["duplicate_of"] = duplicate[1].history_id
         
         history_id = save_history_entry(request.uuid, history_entry)
+        if followup_pregenerator:
+            followup_pregenerator.enqueue(request.uuid, history_id)
         
         return OutreachResponse(
             success=True,
             linkedin_connection_request=messages["linkedin_connection_request"],
             cold_outreach_email=messages["cold_outreach_email"],
             followup_template=messages["followup_template"],
-            history_id=history_id
+            history_id=history_id,
+            variants=variants,
+            duplicate_of=duplicate[1] if duplicate else None
         )
     except HTTPException:
         raise
+    except StructuredOutputError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/outreach/refine", response_model=RefinementResponse)
-async def refine_message(request: RefinementRequest):
+@profiled("endpoint:refine")
+def refine_message(request: RefinementRequest):
     """Refine a message based on user instructions."""
     try:
         # Sanitize inputs
@@ -318,12 +823,15 @@ async def refine_message(request: RefinementRequest):
         if not message or not instructions:
             raise HTTPException(status_code=400, detail="Message and instructions are required")
         
+        _admit(request.uuid, INTERACTIVE)
+        
         # Refine message
-        refined = refinement_agent.refine(
-            original_message=message,
-            refinement_instructions=instructions,
-            message_type=request.message_type
-        )
+        with llm_priority(INTERACTIVE, request.uuid):
+            refined = refinement_agent.refine(
+                original_message=message,
+                refinement_instructions=instructions,
+                message_type=request.message_type
+            )
         
         return RefinementResponse(
             success=True,
@@ -331,12 +839,15 @@ async def refine_message(request: RefinementRequest):
         )
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/outreach/followup", response_model=FollowUpResponse)
-async def generate_followup(request: FollowUpRequest):
+@profiled("endpoint:followup")
+def generate_followup(request: FollowUpRequest):
     """Generate follow-up message when outreach is accepted."""
     try:
         # Load user profile
@@ -344,25 +855,23 @@ async def generate_followup(request: FollowUpRequest):
         if not user_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
         
-        # Load history
-        history = load_history(request.uuid)
-        
-        # Find the specific entry
-        entry = None
-        for h in history:
-            if h.get("id") == request.history_id:
-                entry = h
-                break
-        
+        entry = _find_history_entry(request.uuid, request.history_id)
         if not entry:
             raise HTTPException(status_code=404, detail="History entry not found")
         
-        # Generate follow-up
-        followup_message = followup_agent.generate_followup(
-            original_outreach=entry,
-            user_profile=user_profile,
-            target_profile=entry.get("target_profile", {})
-        )
+        _admit(request.uuid, INTERACTIVE)
+        
+        # Use the pre-generated candidate unless its inputs have changed since
+        candidate = entry.get("followup_candidate") or {}
+        if candidate.get("message") and candidate.get("inputs_hash") == followup_inputs_hash(entry, user_profile):
+            followup_message = candidate["message"]
+        else:
+            with llm_priority(INTERACTIVE, request.uuid):
+                followup_message = followup_agent.generate_followup(
+                    original_outreach=entry,
+                    user_profile=user_profile,
+                    target_profile=entry.get("target_profile", {})
+                )
         
         # Update history entry
         update_history_entry(request.uuid, request.history_id, {
@@ -376,59 +885,194 @@ async def generate_followup(request: FollowUpRequest):
         )
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _history_summary(h: dict) -> dict:
+    """Simplified history entry for the frontend list."""
+    return {
+        "id": h.get("id"),
+        "timestamp": h.get("timestamp"),
+        "status": h.get("status", "draft"),
+        "target_preview": h.get("target_profile_text", "")[:100],
+        "contact_name": h.get("contact_name") or _derive_contact_details(
+            h.get("target_profile", {}),
+            h.get("target_profile_text", "")
+        ).get("contact_name"),
+        "contact_company": h.get("contact_company") or _derive_contact_details(
+            h.get("target_profile", {}),
+            h.get("target_profile_text", "")
+        ).get("contact_company"),
+    }
+
+
 @app.get("/api/history/{uuid}")
-async def get_history(uuid: str):
-    """Get user's outreach history."""
+async def get_history(uuid: str, request: Request, since: Optional[int] = Query(default=None, ge=0)):
+    """Get user's outreach history, or with since=<version> only entries changed after it."""
     try:
-        history = load_history(uuid)
-        # Return simplified version for frontend
-        return {
-            "success": True,
-            "history": [
-                {
-                    "id": h.get("id"),
-                    "timestamp": h.get("timestamp"),
-                    "status": h.get("status", "draft"),
-                    "target_preview": h.get("target_profile_text", "")[:100],
-                    "contact_name": h.get("contact_name") or _derive_contact_details(
-                        h.get("target_profile", {}),
-                        h.get("target_profile_text", "")
-                    ).get("contact_name"),
-                    "contact_company": h.get("contact_company") or _derive_contact_details(
-                        h.get("target_profile", {}),
-                        h.get("target_profile_text", "")
-                    ).get("contact_company"),
-                }
-                for h in history
-            ]
-        }
+        versions = get_versions(uuid)
+        
+        def build() -> Dict[str, Any]:
+            history = load_history(uuid) if since is None else load_history_changes(uuid, since)
+            return {
+                "success": True,
+                "version": versions["version"],
+                "delta": since is not None,
+                "history": [_history_summary(h) for h in history]
+            }
+        
+        return _conditional_json(request, f'W/"h{versions["history_version"]}"', versions["history_modified"], build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/analytics/{uuid}")
+async def get_analytics(uuid: str, request: Request, top: int = Query(default=20, ge=1, le=100)):
+    """Acceptance rates overall and per company, industry and hook type, from pre-aggregated counts."""
+    try:
+        versions = get_versions(uuid)
+        
+        def build() -> Dict[str, Any]:
+            return {"success": True, "version": versions["version"], **summarize(load_analytics(uuid), top)}
+        
+        return _conditional_json(request, f'W/"a{versions["history_version"]}-{top}"', versions["history_modified"], build)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Entries per storage write during imports, and bytes per chunk during exports
+IMPORT_BATCH_ENTRIES = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _export_chunks(entries, compress: bool):
+    """Serialize entries as NDJSON in ~64 KB chunks, gzip-compressed on the fly if asked."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = []
+    size = 0
+    for entry in entries:
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            chunk = b"".join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b"".join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+@app.get("/api/history/{uuid}/export")
+def export_history(
+    uuid: str,
+    compression: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1)
+):
+    """Stream a user's history as NDJSON, oldest first, resumable after the entry ID in cursor."""
+    if compression not in (None, "gzip"):
+        raise HTTPException(status_code=400, detail="compression must be gzip or omitted")
+    
+    entries = iter_history(uuid, after=cursor)
+    try:
+        # Resolve the cursor before the response starts, so a bad one is a 400
+        first = next(entries, None)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Unknown cursor")
+    
+    stream = itertools.chain([first], entries) if first is not None else iter(())
+    if limit is not None:
+        stream = itertools.islice(stream, limit)
+    
+    filename = f"history-{uuid}.ndjson" + (".gz" if compression else "")
+    return StreamingResponse(
+        _export_chunks(stream, compress=compression == "gzip"),
+        media_type="application/gzip" if compression else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.post("/api/history/{uuid}/import")
+async def import_history(uuid: str, request: Request, compression: Optional[str] = None):
+    """Import NDJSON history (optionally gzip-compressed) as a stream; entries already present are skipped."""
+    gzipped = compression == "gzip" or request.headers.get("content-encoding", "").lower() == "gzip"
+    decompressor = zlib.decompressobj(47) if gzipped else None
+    imported = skipped = 0
+    line_number = 0
+    last_id = None
+    batch = []
+    pending = b""
+    
+    async def flush():
+        nonlocal imported, skipped, batch
+        if batch:
+            added, existing = await run_in_threadpool(import_history_entries, uuid, batch)
+            imported += added
+            skipped += existing
+            batch = []
+    
+    async def add_lines(data: bytes, final: bool):
+        nonlocal pending, line_number, last_id
+        lines = (pending + data).split(b"\n")
+        pending = b"" if final else lines.pop()
+        for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if not isinstance(entry, dict):
+                # Keep what came before, so the import can be fixed and resent
+                await flush()
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Line {line_number} is not a JSON object; {imported} entries before it were imported, {skipped} skipped"
+                )
+            last_id = entry.get("id", last_id)
+            batch.append(entry)
+            if len(batch) >= IMPORT_BATCH_ENTRIES:
+                await flush()
+    
+    try:
+        async for chunk in request.stream():
+            await add_lines(decompressor.decompress(chunk) if decompressor else chunk, final=False)
+        await add_lines(decompressor.flush() if decompressor else b"", final=True)
+        await flush()
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Body is not valid gzip data")
+    
+    return {"success": True, "imported": imported, "skipped": skipped, "last_id": last_id}
+
+
 @app.get("/api/history/{uuid}/{history_id}")
 async def get_history_entry(uuid: str, history_id: str):
     """Get a specific history entry."""
     try:
-        history = load_history(uuid)
-        
-        for entry in history:
-            if entry.get("id") == history_id:
-                # Populate contact metadata for older entries that may not have it yet
-                contact_meta = _derive_contact_details(
-                    entry.get("target_profile", {}),
-                    entry.get("target_profile_text", "")
-                )
-                entry.setdefault("contact_name", contact_meta.get("contact_name"))
-                entry.setdefault("contact_company", contact_meta.get("contact_company"))
-                return {
-                    "success": True,
-                    "entry": entry
-                }
+        entry = load_history_entry(uuid, history_id)
+        
+        if entry:
+            # Populate contact metadata for older entries that may not have it yet
+            contact_meta = _derive_contact_details(
+                entry.get("target_profile", {}),
+                entry.get("target_profile_text", "")
+            )
+            entry.setdefault("contact_name", contact_meta.get("contact_name"))
+            entry.setdefault("contact_company", contact_meta.get("contact_company"))
+            return {
+                "success": True,
+                "entry": entry
+            }
         
         raise HTTPException(status_code=404, detail="History entry not found")
     except HTTPException:
@@ -437,6 +1081,41 @@ async def get_history_entry(uuid: str, history_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+
+def _require_admin(token: Optional[str]) -> None:
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not check_admin_token(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/api/admin/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """List stored request profiles, newest first."""
+    _require_admin(x_admin_token)
+    return {"success": True, "profiles": profile_store.list()}
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Get a request profile's per-stage timing breakdown."""
+    _require_admin(x_admin_token)
+    summary = profile_store.get(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {"success": True, "profile": summary}
+
+
+@app.get("/api/admin/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_stacks(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Get a request profile's sampled stacks in folded format for flamegraph tools."""
+    _require_admin(x_admin_token)
+    folded = profile_store.folded(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
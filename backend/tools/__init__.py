@@ -0,0 +1 @@
+"""Developer tools for benchmarking the backend."""
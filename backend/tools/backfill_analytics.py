@@ -0,0 +1,40 @@
+"""
+Build the pre-aggregated outreach analytics for users with existing history.
+
+New history entries update the aggregates as they are saved, but users whose
+history predates them have none until their first analytics request. Run
+this once after deploying to build them all ahead of time:
+
+    python -m backend.tools.backfill_analytics [--uuid UUID ...]
+"""
+import argparse
+import time
+
+try:
+    from backend.logic.storage import list_user_ids, rebuild_analytics
+except ImportError:
+    from logic.storage import list_user_ids, rebuild_analytics
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uuid", nargs="+", help="Only rebuild these users (default: every user)")
+    args = parser.parse_args()
+
+    uuids = args.uuid or sorted(list_user_ids())
+    start = time.perf_counter()
+    failed = 0
+    for uuid in uuids:
+        try:
+            entries = rebuild_analytics(uuid)
+            print(f"{uuid}: {entries} entries")
+        except Exception as e:
+            failed += 1
+            print(f"{uuid}: failed ({e})")
+    print(f"Rebuilt {len(uuids) - failed} of {len(uuids)} users in {time.perf_counter() - start:.1f}s")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Throughput benchmark for sanitize_input.
+
+    python -m backend.tools.bench_sanitizer [--mb 2]
+
+Reports MB/s for the compiled sanitizer against the multi-pass version it
+replaced, on plain, messy-whitespace and HTML-heavy corpora. Correctness is
+covered by tests/test_sanitizer.py.
+"""
+import argparse
+import html
+import random
+import re
+import time
+from typing import Callable, List
+
+try:
+    from backend.logic.sanitizer import sanitize_input
+except ImportError:
+    from logic.sanitizer import sanitize_input
+
+
+def multipass_sanitize(text: str, max_length: int = 8000) -> str:
+    """
+    Unescape plus nine re.sub passes: the sanitizer the compiled rules replaced.
+
+    This is the version just before compilation, which already kept single
+    line breaks for the profile parser. The original sanitizer collapsed all
+    whitespace, newlines included, to one space; that change was deliberate
+    and isn't reproduced here. Script contents leak, since the tag pass runs
+    first.
+    """
+    if not text:
+        return ""
+    text = html.unescape(text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    for pattern in [
+        r'ignore\s+previous\s+instructions',
+        r'system\s*:',
+        r'you\s+are\s+now',
+        r'forget\s+everything',
+        r'new\s+instructions',
+    ]:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' ?\n\s*', '\n', text)
+    return text.strip()[:max_length]
+
+
+def corpus(size_bytes: int, kind: str, seed: int = 7) -> List[str]:
+    """Random profile-like fields of about size_bytes in total: "plain", "messy" whitespace or "html"."""
+    rng = random.Random(seed)
+    words = ["Senior", "Engineer", "at", "Acme", "Corp", "Python", "leadership", "2019", "-", "Present", "Stanford"]
+    fields = []
+    total = 0
+    while total < size_bytes:
+        lines = []
+        for _ in range(rng.randint(20, 60)):
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(2, 10)))
+            if kind == "html":
+                line = f"<div class='x'>{line} &amp; <b>more</b></div>  "
+            elif kind == "messy":
+                line = "  " + line.replace(" ", rng.choice([" ", "  ", "\t"])) + " \r"
+            lines.append(line)
+        field = "\n".join(lines)[:8000]
+        fields.append(field)
+        total += len(field)
+    return fields
+
+
+def _throughput(fn: Callable[[str], str], fields: List[str]) -> float:
+    size_mb = sum(len(f) for f in fields) / 1_000_000
+    start = time.perf_counter()
+    for field in fields:
+        fn(field)
+    return size_mb / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sanitize_input")
+    parser.add_argument("--mb", type=float, default=2.0, help="Megabytes of input per benchmark corpus")
+    args = parser.parse_args()
+
+    print(f"{'corpus':<8} {'multi-pass MB/s':>16} {'compiled MB/s':>14} {'speedup':>8}")
+    for kind in ("plain", "messy", "html"):
+        fields = corpus(int(args.mb * 1_000_000), kind)
+        multipass = _throughput(multipass_sanitize, fields)
+        compiled = _throughput(sanitize_input, fields)
+        print(f"{kind:<8} {multipass:>16.1f} {compiled:>14.1f} {compiled / multipass:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
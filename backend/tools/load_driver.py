@@ -0,0 +1,135 @@
+"""
+Load driver for benchmarking /api/outreach/generate.
+
+Run it against recorded traffic for offline, reproducible numbers:
+
+    LLM_TRANSPORT_MODE=replay LLM_REPLAY_LATENCY_SCALE=1 \\
+        python -m backend.tools.load_driver --user-profile me.txt --targets a.txt b.txt \\
+        --requests 50 --concurrency 8 --users 4
+
+Record the cassette first with LLM_TRANSPORT_MODE=record against the live
+APIs. Without --url the app runs in-process; with --url requests go to a
+running server.
+"""
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+Caller = Callable[[str, str, Dict[str, Any]], Tuple[int, Any]]
+
+
+def _in_process_caller() -> Caller:
+    from fastapi.testclient import TestClient
+    try:
+        from backend.main import app
+    except ImportError:
+        from main import app
+    client = TestClient(app)
+
+    def call(method: str, path: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        response = client.request(method, path, json=payload or None)
+        return response.status_code, response.json()
+
+    return call
+
+
+def _http_caller(base_url: str) -> Caller:
+    def call(method: str, path: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        data = json.dumps(payload).encode("utf-8") if payload else None
+        request = urllib.request.Request(
+            base_url.rstrip("/") + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, None
+
+    return call
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    call = _http_caller(args.url) if args.url else _in_process_caller()
+    with open(args.user_profile, encoding="utf-8") as f:
+        user_profile = f.read()
+    targets = []
+    for path in args.targets:
+        with open(path, encoding="utf-8") as f:
+            targets.append(f.read())
+
+    uuids = [f"{args.uuid_prefix}-{i}" for i in range(args.users)]
+    for uuid in uuids:
+        status, _ = call("POST", "/api/user/profile", {"uuid": uuid, "profile_text": user_profile})
+        if status != 200:
+            raise SystemExit(f"Saving the user profile for {uuid} failed with HTTP {status}")
+
+    def one(i: int) -> Tuple[int, float]:
+        payload = {
+            "uuid": uuids[i % len(uuids)],
+            "target_profile": targets[i % len(targets)],
+            "context_note": args.context_note,
+            "variants": args.variants
+        }
+        start = time.perf_counter()
+        status, _ = call("POST", "/api/outreach/generate", payload)
+        return status, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        outcomes = list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    latencies = [latency for status, latency in outcomes if status == 200]
+    statuses: Dict[str, int] = {}
+    for status, _ in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "statuses": statuses,
+        "wall_seconds": round(wall, 2),
+        "throughput_rps": round(args.requests / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p95": round(_percentile(latencies, 95) * 1000, 1),
+            "p99": round(_percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies, default=0.0) * 1000, 1)
+        }
+    }
+    if args.metrics:
+        _, report["server_metrics"] = call("GET", "/api/metrics", {})
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark /api/outreach/generate")
+    parser.add_argument("--user-profile", required=True, help="Text file with the sender's LinkedIn profile")
+    parser.add_argument("--targets", nargs="+", required=True, help="Text files with target profiles, used round-robin")
+    parser.add_argument("--context-note", default="")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--users", type=int, default=1, help="Spread requests across this many uuids")
+    parser.add_argument("--uuid-prefix", default="loadtest")
+    parser.add_argument("--variants", type=int, default=1)
+    parser.add_argument("--url", help="Base URL of a running server; runs the app in-process if omitted")
+    parser.add_argument("--metrics", action="store_true", help="Include /api/metrics in the report")
+    print(json.dumps(run(parser.parse_args()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
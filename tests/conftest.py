@@ -0,0 +1,10 @@
+import pytest
+
+from backend.logic import storage
+
+
+@pytest.fixture
+def users_root(tmp_path, monkeypatch):
+    """Point user storage at a temporary directory."""
+    monkeypatch.setattr(storage, "_users_root", lambda: tmp_path / "users")
+    return tmp_path / "users"
@@ -0,0 +1,95 @@
+"""Tests for history compaction, export and import."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.logic import storage
+
+
+def _save(uuid, count, days_ago, status="sent"):
+    now = datetime.now()
+    ids = []
+    for i in range(count):
+        timestamp = (now - timedelta(days=days_ago, minutes=count - i)).isoformat()
+        ids.append(storage.save_history_entry(uuid, {"target_name": f"t{i}", "status": status, "timestamp": timestamp}))
+    return ids
+
+
+def _hot_ids(users_root, uuid):
+    with open(users_root / uuid / "history.json") as f:
+        return {entry["id"] for entry in json.load(f)}
+
+
+def test_compaction_archives_old_entries(users_root):
+    old = _save("u1", 5, days_ago=60)
+    recent = _save("u1", 3, days_ago=1)
+    drafts = _save("u1", 2, days_ago=50, status="draft")
+
+    assert storage.compact_history("u1") == 5
+    assert _hot_ids(users_root, "u1") == set(recent + drafts)
+    assert [e["id"] for e in storage.load_history("u1")] == old + drafts + recent
+    assert storage.load_history_entry("u1", old[0])["target_name"] == "t0"
+    assert storage.compact_history("u1") == 0
+
+
+def test_compaction_bounds_hot_tier(users_root, monkeypatch):
+    monkeypatch.setattr(storage, "HISTORY_HOT_MAX_ENTRIES", 4)
+    monkeypatch.setattr(storage, "HISTORY_SEGMENT_ENTRIES", 3)
+    ids = _save("u2", 10, days_ago=1)
+
+    assert storage.compact_history("u2") == 6
+    assert _hot_ids(users_root, "u2") == set(ids[-4:])
+    assert [e["id"] for e in storage.iter_history("u2")] == ids
+
+
+def test_update_archived_entry(users_root):
+    ids = _save("u3", 3, days_ago=60)
+    storage.compact_history("u3")
+
+    assert storage.update_history_entry("u3", ids[1], {"status": "replied"})
+    assert storage.load_history_entry("u3", ids[1])["status"] == "replied"
+    assert [e["id"] for e in storage.load_history("u3")] == ids
+
+
+def test_iter_history_cursor(users_root):
+    ids = _save("u4", 6, days_ago=60)
+    storage.compact_history("u4")
+
+    assert [e["id"] for e in storage.iter_history("u4", after=ids[2])] == ids[3:]
+    with pytest.raises(KeyError):
+        list(storage.iter_history("u4", after="missing"))
+
+
+def test_iteration_survives_compaction(users_root, monkeypatch):
+    monkeypatch.setattr(storage, "HISTORY_HOT_MAX_ENTRIES", 2)
+    ids = _save("u5", 5, days_ago=1)
+    storage.compact_history("u5")
+
+    entries = storage.iter_history("u5")
+    first = next(entries)
+    ids += _save("u5", 3, days_ago=0)
+    storage.compact_history("u5")
+
+    # The export in progress sees the history as it was when it started
+    assert [first["id"]] + [e["id"] for e in entries] == ids[:5]
+
+
+def test_export_import_round_trip(users_root, monkeypatch):
+    monkeypatch.setattr(storage, "HISTORY_HOT_MAX_ENTRIES", 3)
+    _save("source", 4, days_ago=60)
+    _save("source", 4, days_ago=1, status="draft")
+    storage.compact_history("source")
+    exported = [json.dumps(entry) for entry in storage.iter_history("source")]
+
+    entries = [json.loads(line) for line in exported]
+    assert storage.import_history_entries("dest", entries) == (8, 0)
+
+    def fields(uuid):
+        return [(e["id"], e["timestamp"], e["target_name"], e["status"]) for e in storage.iter_history(uuid)]
+
+    assert fields("dest") == fields("source")
+    assert len(_hot_ids(users_root, "dest")) <= 3
+    # Sending the same export again imports nothing
+    assert storage.import_history_entries("dest", [json.loads(line) for line in exported]) == (0, 8)
+    assert len(fields("dest")) == 8